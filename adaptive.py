@@ -0,0 +1,227 @@
+import json
+import os
+from time import time
+import numpy as np
+import sorts as sorts
+
+
+# the sorts the dispatcher can pick from, all take a dataset and return (array, runtime)
+STRATEGIES = {
+    'introsort': sorts.introsort,
+    'naturalMergesort': sorts.naturalMergesort,
+    'radixVectorized': sorts.radixVectorized,
+}
+
+# thresholds used when no calibrated profile exists, copied from a calibration run (python adaptive.py --trials 5),
+# rerun it to see the timings behind every value on this machine
+#   small: inputs up to this length go to introsort, whose insertion sort finishes them without setup
+#   runs, presorted_size: inputs with at most runs monotone runs per element go to naturalMergesort, numeric
+#       ones only up to presorted_size elements (radix sorts are not slowed down by order), -1 disables the rule
+#   duplicates: inputs with at least this share of repeated keys in the sample go to introsort (three-way
+#       partitioning), a value above 1 disables the rule. calibration leaves it disabled: above the small size
+#       radixVectorized beat introsort on every few-unique and zipf input, e.g. 0.14 ms against 1.8 ms at 1024
+#   bits: numeric inputs whose key range fits in this many bits go to radixVectorized, other keys go to introsort
+#   fallback: the sort used for numeric keys wider than bits
+DEFAULT_PROFILE = {'small': 64, 'runs': 0.00390625, 'presorted_size': 1024, 'duplicates': 2.0, 'bits': 62,
+                   'fallback': 'radixVectorized'}
+
+# where calibrate() writes the profile and sort() looks for it
+PROFILE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sort_profile.json')
+
+# the number of elements drawn to estimate the duplicate ratio
+SAMPLE = 1024
+
+# the profile loaded from PROFILE_FILE, read once on first use
+loaded = None
+
+
+# ==================================================== SORT ====================================================
+
+
+def sort(dataset, profile=None, verbose=False):
+    """
+    adaptive sort: measures the input (see features()), picks a sort with the rules of a calibrated profile
+    (see choose()) and runs it. inputs that are already in order are returned untouched.
+
+    :param dataset: input array, sorted in place when it is an ndarray
+    :param profile: a profile dict or the path of a profile file - optional, PROFILE_FILE if it exists,
+        else DEFAULT_PROFILE
+    :param verbose: whether the chosen sort and the reason for it should be printed, default False
+    :return: sorted array, the runtime of the sort (including the sampling)
+    """
+    start_time = time()
+    if not isinstance(dataset, np.ndarray): dataset = np.asarray(dataset)
+    choice = choose(dataset, profile)
+    if verbose: print(f'{choice["sort"] or "no sort"}: {choice["reason"]}')
+    if choice['sort'] is not None:
+        dataset, _ = STRATEGIES[choice['sort']](dataset)
+    end_time = time()
+    return dataset, end_time - start_time
+
+
+def choose(dataset, profile=None):
+    """
+    picks the sort for a dataset. the rules are tried in order: already sorted, small, presorted (few runs),
+    many duplicates, keys that are not numeric, narrow numeric keys, then the profile's fallback.
+
+    :param dataset: input array
+    :param profile: a profile dict or the path of a profile file - optional, see sort()
+    :return: dict of the chosen sort (a key of STRATEGIES, None if the input is already sorted), a readable
+        reason and the measured features
+    """
+    profile = loadProfile(profile)
+    stats = features(dataset)
+    size = stats['size']
+
+    def pick(name, reason): return {'sort': name, 'reason': reason, 'features': stats}
+
+    if stats['descents'] == 0:
+        return pick(None, 'already sorted, no descents found')
+    if size <= profile['small']:
+        return pick('introsort', f'size {size} <= small threshold {profile["small"]}')
+    run_ratio = stats['runs'] / size
+    if run_ratio <= profile['runs'] and (size <= profile['presorted_size'] or not stats['numeric']):
+        return pick('naturalMergesort', f'{stats["runs"]} runs in {size} elements, {run_ratio:.4f} runs per '
+                                        f'element <= presorted threshold {profile["runs"]}')
+    if stats['duplicates'] >= profile['duplicates']:
+        return pick('introsort', f'duplicate ratio {stats["duplicates"]:.3f} >= threshold {profile["duplicates"]}')
+    if not stats['numeric']:
+        return pick('introsort', f'{stats["dtype"]} keys can not be radix sorted')
+    if stats['bits'] <= profile['bits']:
+        return pick('radixVectorized', f'numeric {stats["dtype"]} keys spanning {stats["bits"]} bits '
+                                       f'<= radix threshold {profile["bits"]}')
+    return pick(profile['fallback'], f'keys spanning {stats["bits"]} bits > radix threshold {profile["bits"]}, '
+                                     f'using the profile fallback')
+
+
+def features(dataset, sample=SAMPLE, seed=0):
+    """
+    measures what the dispatch rules look at. the range and the runs are vectorized whole-array passes,
+    the duplicate ratio is estimated from a random sample.
+
+    :param dataset: input array
+    :param sample: the number of elements drawn for the duplicate ratio, default 1024
+    :param seed: seed of the sampling generator, default 0
+    :return: dict of size, dtype, whether the keys are numeric (radix sortable), the number of bits spanned by
+        the key range, the sample duplicate ratio (1 - distinct / sampled), the number of descents and the
+        approximate number of monotone (ascending or descending) runs
+    """
+    dataset = np.asarray(dataset)
+    size = len(dataset)
+    kind = dataset.dtype.kind
+    numeric = kind in 'uif'
+    stats = {'size': size, 'dtype': dataset.dtype.str, 'numeric': numeric, 'bits': 0, 'duplicates': 0.0,
+             'descents': 0, 'runs': 1 if size else 0}
+    if size < 2: return stats
+    # +1 for a rise, -1 for a fall, compared rather than subtracted so unsigned keys can't wrap around
+    steps = (dataset[1:] > dataset[:-1]).astype(np.int8) - (dataset[1:] < dataset[:-1])
+    stats['descents'] = int(np.count_nonzero(steps < 0))
+    # equal neighbours extend either kind of run, so only the changes of direction between the others count,
+    # which is what naturalMergesort (via findRuns) sees, reversed runs included
+    turns = steps[steps != 0]
+    stats['runs'] = 1 + int(np.count_nonzero(turns[1:] != turns[:-1]))
+    if kind in 'ui':
+        stats['bits'] = (int(dataset.max()) - int(dataset.min())).bit_length()
+    elif kind == 'f':
+        stats['bits'] = 8 * dataset.dtype.itemsize
+    drawn = dataset if size <= sample else dataset[np.random.default_rng(seed).integers(0, size, sample)]
+    stats['duplicates'] = 1 - len(np.unique(drawn)) / len(drawn)
+    return stats
+
+
+# ================================================= CALIBRATION =================================================
+
+
+def calibrate(sizes=(16, 64, 256, 1024, 4096, 65536), distributions=None, warmup=1, trials=3, seed=0,
+              file=PROFILE_FILE, verbose=True):
+    """
+    derives the profile thresholds from a benchmark run. every strategy is timed with benchmark.benchSort on
+    every size and benchmark distribution, then each threshold is set as far as its sort kept winning:
+    small is the largest size introsort won on unordered input, runs and presorted_size the highest run ratio
+    and the largest size naturalMergesort won at above the small size, duplicates the lowest duplicate ratio
+    introsort won at above the small size and bits the widest key range radixVectorized won on. the fallback
+    is the sort that won the most cases.
+
+    :param sizes: the input lengths to calibrate on, default (16, 64, 256, 1024, 4096, 65536)
+    :param distributions: a list of keys of benchmark.DISTRIBUTIONS - optional, all if None
+    :param warmup: the number of untimed runs before the trials, default 1
+    :param trials: the number of timed runs, default 3
+    :param seed: seed of the generator used for the inputs, default 0
+    :param file: where the profile is written, None to skip writing - default PROFILE_FILE
+    :param verbose: whether each case should be printed, default True
+    :return: the profile dict, with the benchmark environment and the winning sort of every case under 'cases'
+    """
+    # deferred so sorting never pays for importing the benchmark harness
+    import benchmark as benchmark
+    distributions = list(benchmark.DISTRIBUTIONS) if distributions is None else distributions
+    rng = np.random.default_rng(seed)
+    cases = []
+    for size in sizes:
+        for dist in distributions:
+            dataset = benchmark.DISTRIBUTIONS[dist](rng, size)
+            times = {}
+            for name in STRATEGIES:
+                result = benchmark.benchSort(name, dataset, warmup, trials)
+                if result['valid']: times[name] = result['median_ns']
+            winner = min(times, key=times.get)
+            stats = features(dataset)
+            cases.append({'distribution': dist, 'size': size, 'winner': winner, 'median_ns': times,
+                          'runs': stats['runs'] / size, 'duplicates': stats['duplicates'], 'bits': stats['bits']})
+            if verbose: print(f'{dist} {size}: {winner} ({times[winner] / 1e6:.3f} ms)')
+    profile = dict(DEFAULT_PROFILE)
+    unordered = [case for case in cases if case['runs'] > 0.25]
+    profile['small'] = max((c['size'] for c in unordered if c['winner'] == 'introsort'), default=0)
+    # the later rules only ever see inputs larger than small
+    large = [case for case in cases if case['size'] > profile['small']]
+    presorted = [case for case in large if case['winner'] == 'naturalMergesort']
+    profile['runs'] = max((c['runs'] for c in presorted), default=-1.0)
+    profile['presorted_size'] = max((c['size'] for c in presorted), default=0)
+    profile['duplicates'] = min((c['duplicates'] for c in large if c['winner'] == 'introsort'), default=2.0)
+    profile['bits'] = max((c['bits'] for c in cases if c['winner'] == 'radixVectorized'), default=0)
+    winners = [case['winner'] for case in cases]
+    profile['fallback'] = max(STRATEGIES, key=winners.count)
+    profile['meta'] = benchmark.environment(seed, warmup, trials)
+    profile['cases'] = cases
+    if file is not None:
+        with open(file, 'w') as f: json.dump(profile, f, indent=1)
+    return profile
+
+
+# =================================================== HELPERS ===================================================
+
+
+def loadProfile(profile=None):
+    """
+    :param profile: a profile dict, the path of a profile file or None for PROFILE_FILE (cached after the
+        first read) falling back to DEFAULT_PROFILE
+    :return: the profile dict, any missing thresholds filled in from DEFAULT_PROFILE
+    """
+    global loaded
+    if isinstance(profile, dict): return {**DEFAULT_PROFILE, **profile}
+    if profile is not None:
+        with open(profile) as f: return {**DEFAULT_PROFILE, **json.load(f)}
+    if loaded is None:
+        loaded = dict(DEFAULT_PROFILE)
+        if os.path.exists(PROFILE_FILE):
+            with open(PROFILE_FILE) as f: loaded.update(json.load(f))
+    return loaded
+
+
+# =========================================== DATA, FILE I/O, TESTING ===========================================
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='calibrate the adaptive sort dispatcher')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[16, 64, 256, 1024, 4096, 65536])
+    parser.add_argument('--trials', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=PROFILE_FILE)
+    args = parser.parse_args(argv)
+    profile = calibrate(args.sizes, trials=args.trials, seed=args.seed, file=args.out)
+    print(json.dumps({key: value for key, value in profile.items() if key not in ('meta', 'cases')}))
+    print(f'Profile written to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+import argparse
+import os
+import sys
+
+
+# numpy and the algorithm modules are imported inside the commands, so --help and argument errors never pay
+# for them. text is one number per line (of the --dtype given), binary is the datafile format.
+FORMATS = ('auto', 'text', 'binary')
+
+
+# =================================================== COMMANDS ===================================================
+
+
+def sortCommand(args):
+    """
+    sorts a text or binary dataset from a file or stdin. the input is read in chunks of args.chunk elements;
+    input that fits in one chunk is sorted in memory, larger input is sorted chunk by chunk into temporary
+    runs that are then merged, so memory stays bounded by the chunk size.
+    """
+    import tempfile
+    from itertools import chain
+    import numpy as np
+    import datafile as datafile
+    import merges as merges
+    run = sortFunction(args.algorithm)
+    header, chunks = readInput(args.input, args.format, args.chunk, args.dtype)
+    dtype = header['dtype'] if header is not None else np.dtype(args.dtype)
+    first = next(chunks, None)
+    second = next(chunks, None) if first is not None else None
+    if first is None:
+        writeOutput(args.output, args.out_format, iter(()), dtype, 0, True)
+    elif second is None:
+        # the whole input is one chunk, no runs are needed
+        first = run(first)
+        writeOutput(args.output, args.out_format, blocks(first, args.chunk), dtype, len(first), True)
+    else:
+        with tempfile.TemporaryDirectory(dir=args.tmpdir) as workdir:
+            runs = []
+            for data in chain((first, second), chunks):
+                path = os.path.join(workdir, f'run{len(runs)}.bin')
+                datafile.writeBinary(path, run(data), True, False)
+                runs.append(datafile.readBinary(path)[0])
+            length = sum(len(data) for data in runs)
+            # a block of chunk / len(runs) per run keeps the loaded blocks of the merge within one chunk
+            merged = merges.kWayMerge(runs, block=max(1, args.chunk // len(runs)))
+            writeOutput(args.output, args.out_format, merged, dtype, length, True)
+            del runs
+    return 0
+
+
+def searchCommand(args):
+    """
+    looks keys up in a dataset. the dataset is loaded once (binary files that are flagged sorted are memory
+    mapped, anything else is sorted first), the keys are streamed from the command line, a file or stdin and
+    answered a chunk at a time, one line per key: the key followed by the result, -1 where it is not found.
+    """
+    import numpy as np
+    from registry import SEARCHES
+    from searches import NOT_FOUND
+    if args.algorithm not in SEARCHES:
+        raise SystemExit(f'unknown search {args.algorithm}, choose from {", ".join(SEARCHES)}')
+    search, batch = SEARCHES[args.algorithm]
+    # range searches answer with a (least, greatest) pair, a missing key prints -1 in both columns
+    width = 2 if args.algorithm.endswith('Range') else 1
+    dataset = loadSorted(args.data, args.format, args.chunk, args.dtype)
+    # keys are parsed as the dataset's dtype, so float datasets take float keys
+    if args.keys is not None: keys = readInput(args.keys, 'text', args.chunk, dataset.dtype)[1]
+    else: keys = blocks(np.array(args.key, dtype=dataset.dtype), args.chunk)
+    out = openOutput(args.output)
+    try:
+        for block in keys:
+            if batch:
+                result, _ = search(dataset, block)
+                # keys and results are printed from separate lists, a float key doesn't turn an index into a float
+                rows = [(key, *found) for key, found in zip(block.tolist(), result.reshape(len(block), -1).tolist())]
+            else:
+                rows = [(key, *flatten(search(dataset, key)[0], NOT_FOUND, width)) for key in block.tolist()]
+            out.write(''.join(' '.join(map(str, row)) + '\n' for row in rows).encode())
+    finally:
+        if out is not sys.stdout.buffer: out.close()
+    return 0
+
+
+def genCommand(args):
+    """
+    generates a dataset following one of the named distributions of sorts.genChunks, streamed in chunks.
+    """
+    import numpy as np
+    import sorts as sorts
+    if args.distribution not in sorts.DISTRIBUTIONS:
+        raise SystemExit(f'unknown distribution {args.distribution}, choose from {", ".join(sorts.DISTRIBUTIONS)}')
+    dtype = np.dtype(args.dtype)
+    chunks = sorts.genChunks(args.size, args.distribution, args.power, dtype, args.seed, args.chunk)
+    writeOutput(args.output, args.out_format, chunks, dtype, args.size, False)
+    return 0
+
+
+def benchCommand(args):
+    """
+    runs benchmark.main with the remaining arguments.
+    """
+    import benchmark as benchmark
+    return benchmark.main(args.rest)
+
+
+# =================================================== HELPERS ===================================================
+
+
+def sortFunction(name):
+    """
+    :param name: a key of registry.SORTS
+    :return: a function sorting an array and returning it, argsorts are applied to the data
+    """
+    from registry import SORTS
+    if name not in SORTS:
+        raise SystemExit(f'unknown sort {name}, choose from {", ".join(SORTS)}')
+    sort, opt = SORTS[name]
+
+    def run(data):
+        output, _ = sort(data) if opt is None else sort(data, opt)
+        return data[output] if name.endswith('Argsort') else output
+
+    return run
+
+
+def readInput(file, fmt, chunk, dtype=None):
+    """
+    opens a dataset for streaming.
+
+    :param file: the path of the input, '-' or None for stdin
+    :param fmt: one of FORMATS, auto detects binary datasets by their magic bytes
+    :param chunk: the maximum number of elements per array
+    :param dtype: the dtype of text input - optional, int64 if None
+    :return: the header dict (None for text input) and a generator of arrays
+    """
+    import numpy as np
+    import datafile as datafile
+    stream = sys.stdin.buffer if file in (None, '-') else None
+    if fmt == 'auto':
+        if stream is not None: magic, stream = datafile.peekStream(stream, len(datafile.MAGIC))
+        else:
+            with open(file, 'rb') as f: magic = f.read(len(datafile.MAGIC))
+        fmt = 'binary' if magic == datafile.MAGIC else 'text'
+    if fmt == 'binary': return datafile.readBinaryChunks(file if stream is None else stream, chunk)
+    return None, datafile.readTextChunks(file if stream is None else stream, chunk, dtype or np.int64)
+
+
+def loadSorted(file, fmt, chunk, dtype=None):
+    """
+    loads a dataset for searching, sorting it unless it is a binary file flagged as sorted.
+
+    :param file: the path of the dataset, '-' or None for stdin
+    :param fmt: one of FORMATS
+    :param chunk: the number of elements read at once
+    :param dtype: the dtype of text input - optional, int64 if None
+    :return: the sorted array
+    """
+    import numpy as np
+    import datafile as datafile
+    if file not in (None, '-') and fmt != 'text':
+        try:
+            data, header = datafile.readBinary(file)
+            if header['sorted']: return data
+        except ValueError:
+            if fmt == 'binary': raise
+    header, chunks = readInput(file, fmt, chunk, dtype)
+    parts = list(chunks)
+    dtype = header['dtype'] if header is not None else dtype or np.int64
+    data = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+    if header is None or not header['sorted']: data.sort(kind='stable')
+    return data
+
+
+def openOutput(file):
+    """
+    :param file: the path of the output, '-' or None for stdout
+    :return: a file object opened for writing bytes
+    """
+    return sys.stdout.buffer if file in (None, '-') else open(file, 'wb')
+
+
+def writeOutput(file, fmt, chunks, dtype, length, is_sorted):
+    """
+    writes a stream of arrays as text or as a binary dataset. binary files get their header (with checksum)
+    written last by datafile.writeChunks, stdout can't seek back so it gets a header without checksum first.
+
+    :param file: the path of the output, '-' or None for stdout
+    :param fmt: 'text' or 'binary'
+    :param chunks: an iterable of arrays
+    :param dtype: the dtype of the elements
+    :param length: the total number of elements
+    :param is_sorted: value of the sortedness flag for binary stdout
+    :return: None
+    """
+    import datafile as datafile
+    if fmt == 'binary' and file not in (None, '-'):
+        datafile.writeChunks(file, chunks, dtype)
+        return
+    out = openOutput(file)
+    try:
+        if fmt == 'binary': datafile.writeBinaryStream(out, chunks, dtype, length, is_sorted)
+        else: datafile.writeText(out, chunks)
+        out.flush()
+    finally:
+        if out is not sys.stdout.buffer: out.close()
+
+
+def blocks(dataset, chunk):
+    """
+    :return: a generator of consecutive slices of at most chunk elements
+    """
+    return (dataset[i:i + chunk] for i in range(0, len(dataset), chunk))
+
+
+def flatten(result, missing, width=1):
+    """
+    :param result: the result of a single search, an index, a (least, greatest) tuple or None
+    :param missing: the value printed for a key that is not found
+    :param width: the number of values a found key prints, so missing keys print as many columns, default 1
+    :return: a tuple of the values to print
+    """
+    if isinstance(result, tuple): return result
+    return (missing,) * width if result is None else (result,)
+
+
+# =========================================== DATA, FILE I/O, TESTING ===========================================
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='algorithms', description='sort, search, generate and benchmark datasets')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sort = commands.add_parser('sort', help='sort a dataset')
+    sort.add_argument('input', nargs='?', help='input file, stdin if omitted or -')
+    sort.add_argument('-a', '--algorithm', default='sort', help='a sort from the benchmark, default: adaptive sort')
+    sort.add_argument('--chunk', type=int, default=1 << 22, help='elements sorted in memory at once')
+    sort.add_argument('--tmpdir', help='directory for the runs of inputs larger than a chunk')
+    sort.set_defaults(run=sortCommand)
+
+    search = commands.add_parser('search', help='look keys up in a dataset')
+    search.add_argument('key', nargs='*', help='keys to look up, parsed as the dtype of the dataset')
+    search.add_argument('-d', '--data', required=True, help='dataset file, - for stdin')
+    search.add_argument('-k', '--keys', help='text file of keys, - for stdin')
+    search.add_argument('-a', '--algorithm', default='binarySearchRangeBatch', help='a search from the benchmark')
+    search.add_argument('--chunk', type=int, default=1 << 16, help='keys answered at once')
+    search.set_defaults(run=searchCommand)
+
+    gen = commands.add_parser('gen', help='generate a dataset')
+    gen.add_argument('size', type=int)
+    gen.add_argument('--distribution', default='uniform')
+    gen.add_argument('--power', type=int, default=31)
+    gen.add_argument('--dtype', default='int64')
+    gen.add_argument('--seed', type=int)
+    gen.add_argument('--chunk', type=int, default=1 << 20, help='elements generated at once')
+    gen.set_defaults(run=genCommand)
+
+    for command in (sort, search, gen):
+        command.add_argument('-o', '--output', help='output file, stdout if omitted or -')
+        if command is not gen:
+            command.add_argument('-f', '--format', choices=FORMATS, default='auto', help='input format')
+            command.add_argument('--dtype', default='int64', help='dtype of text input, binary input has its own')
+        if command is not search:
+            command.add_argument('-F', '--out-format', choices=FORMATS[1:], default='text', help='output format')
+
+    bench = commands.add_parser('bench', help='run the benchmark, arguments are passed to benchmark.py',
+                                add_help=False)
+    bench.set_defaults(run=benchCommand)
+
+    # everything after bench belongs to benchmark.main, which does its own parsing
+    args, rest = parser.parse_known_args(argv)
+    if args.command != 'bench' and rest: parser.error(f'unrecognized arguments: {" ".join(rest)}')
+    args.rest = rest
+    try:
+        return args.run(args)
+    except BrokenPipeError:
+        # the reader went away (e.g. piped into head), stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,298 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tracemalloc
+from time import perf_counter_ns, strftime
+import numpy as np
+import sorts as sorts
+# the registries live in their own module so the command-line tool can use them without importing this one
+from registry import SEARCHES, SORTS
+
+
+# (sort, distribution) pairs that are skipped: radixLSD2P allocates 2 ** (bits / 2) buckets per pass,
+# which for 62-bit keys is more memory than any machine has
+SKIP = {('radixLSD2P', 'large-power')}
+
+# the largest input the default sweep gives the quadratic sorts: quicksort degrades to O(n^2) on sorted and
+# organ-pipe input (seconds per run at 2000 elements) and mergesort shifts lists with pop(0). naming them with
+# --sorts runs them at every size
+MAX_SIZE = {'quicksort': 1 << 10, 'mergesort': 1 << 12}
+
+# the commands benchStartup times in a fresh interpreter: a bare interpreter as the baseline, the cli when it only
+# parses arguments, and the cli sorting a three line input, which is dominated by the deferred imports
+STARTUP = {
+    'python': ['-c', 'pass'],
+    'cli-help': ['-m', 'algorithms', '--help'],
+    'cli-sort': ['-m', 'algorithms', 'sort'],
+}
+
+
+# ================================================= DISTRIBUTIONS =================================================
+
+
+def generate(distribution, power=31):
+    """
+    :param distribution: one of sorts.DISTRIBUTIONS
+    :param power: 2^power is the max bound of the values, default 31
+    :return: a function of a np.random.Generator and a size drawing that distribution with sorts.genDistribution
+    """
+    return lambda rng, size: sorts.genDistribution(size, distribution, power, seed=rng)
+
+
+# every distribution sorts can generate, plus uniform 62-bit keys for the radix sorts
+DISTRIBUTIONS = {**{name: generate(name) for name in sorts.DISTRIBUTIONS}, 'large-power': generate('uniform', 62)}
+
+
+# =================================================== BENCHMARK ===================================================
+
+
+def benchSort(name, dataset, warmup=1, trials=5):
+    """
+    times one sort on copies of the same input. the copy is made outside the timed region.
+
+    :param name: a key of SORTS
+    :param dataset: the input array, left untouched
+    :param warmup: the number of untimed runs before the trials, default 1
+    :param trials: the number of timed runs, default 5
+    :return: a result dict with the timings, throughput, peak memory and whether the output was sorted
+    """
+    sort, opt = SORTS[name]
+    run = (lambda data: sort(data)) if opt is None else (lambda data: sort(data, opt))
+    for _ in range(warmup): run(dataset.copy())
+    times = []
+    for _ in range(trials):
+        data = dataset.copy()
+        start = perf_counter_ns()
+        output, _ = run(data)
+        times.append(perf_counter_ns() - start)
+    # argsorts return the permutation rather than the sorted data
+    output = dataset[output] if name.endswith('Argsort') else np.asarray(output)
+    result = summarize(times, len(dataset), peakMemory(run, dataset.copy()))
+    result['valid'] = bool(np.all(output[:-1] <= output[1:]))
+    return result
+
+
+def benchSearch(name, dataset, keys, warmup=1, trials=5):
+    """
+    times one search answering a whole set of keys against the same sorted array.
+
+    :param name: a key of SEARCHES
+    :param dataset: a sorted array
+    :param keys: the array of keys to be searched for
+    :param warmup: the number of untimed runs before the trials, default 1
+    :param trials: the number of timed runs, default 5
+    :return: a result dict with the timings, throughput (keys per second), peak memory and total iterations
+    """
+    search, batch = SEARCHES[name]
+    if batch:
+        def run(data): return search(data, keys)[1]
+    else:
+        def run(data): return sum(search(data, key)[1] for key in keys)
+    for _ in range(warmup): run(dataset)
+    times = []
+    for _ in range(trials):
+        start = perf_counter_ns()
+        iterations = run(dataset)
+        times.append(perf_counter_ns() - start)
+    result = summarize(times, len(keys), peakMemory(run, dataset))
+    result['iterations'] = int(iterations)
+    return result
+
+
+def benchStartup(name, warmup=1, trials=5):
+    """
+    times one command of STARTUP from process creation to exit.
+
+    :param name: a key of STARTUP
+    :param warmup: the number of untimed runs before the trials, default 1
+    :param trials: the number of timed runs, default 5
+    :return: a result dict with the timings and throughput (runs per second)
+    """
+    command = [sys.executable, *STARTUP[name]]
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    def run(): subprocess.run(command, input=b'3\n1\n2\n', stdout=subprocess.DEVNULL, cwd=cwd, check=True)
+
+    for _ in range(warmup): run()
+    times = []
+    for _ in range(trials):
+        start = perf_counter_ns()
+        run()
+        times.append(perf_counter_ns() - start)
+    return summarize(times, 1, None)
+
+
+def runBenchmark(sizes, distributions=None, sort_names=None, search_names=None, queries=1000,
+                 warmup=1, trials=5, seed=0, verbose=True, startup_names=None):
+    """
+    sweeps every selected sort and search over every size and input distribution.
+
+    :param sizes: a list of input lengths
+    :param distributions: a list of keys of DISTRIBUTIONS - optional, all if None
+    :param sort_names: a list of keys of SORTS - optional, all if None, the ones in MAX_SIZE only up to their size
+    :param search_names: a list of keys of SEARCHES - optional, all if None
+    :param queries: the number of keys per search run, half present in the data and half random, default 1000
+    :param warmup: the number of untimed runs before the trials, default 1
+    :param trials: the number of timed runs, default 5
+    :param seed: seed of the generator used for the inputs, default 0
+    :param verbose: whether each result should be printed as it finishes, default True
+    :param startup_names: a list of keys of STARTUP - optional, all if None
+    :return: a report dict with the environment under 'meta' and a list of result dicts under 'results'
+    """
+    distributions = list(DISTRIBUTIONS) if distributions is None else distributions
+    limits = MAX_SIZE if sort_names is None else {}
+    sort_names = list(SORTS) if sort_names is None else sort_names
+    search_names = list(SEARCHES) if search_names is None else search_names
+    startup_names = list(STARTUP) if startup_names is None else startup_names
+    rng = np.random.default_rng(seed)
+    results = []
+    for name in startup_names:
+        results.append(record('startup', name, '-', 0, benchStartup(name, warmup, trials), verbose))
+    for size in sizes:
+        for dist in distributions:
+            dataset = DISTRIBUTIONS[dist](rng, size)
+            for name in sort_names:
+                if (name, dist) in SKIP or size > limits.get(name, size): continue
+                result = benchSort(name, dataset, warmup, trials)
+                results.append(record('sort', name, dist, size, result, verbose))
+            if not search_names or size == 0: continue
+            ordered = np.sort(dataset)
+            keys = np.concatenate((rng.choice(ordered, queries // 2),
+                                   rng.integers(0, int(ordered[-1]) + 1, queries - queries // 2)))
+            for name in search_names:
+                result = benchSearch(name, ordered, keys, warmup, trials)
+                results.append(record('search', name, dist, size, result, verbose))
+    return {'meta': environment(seed, warmup, trials), 'results': results}
+
+
+def compare(report, baseline, tolerance=0.1, verbose=True):
+    """
+    compares the median times of a report against a saved baseline, matching results by kind, name,
+    distribution and size. results missing from either side are ignored.
+
+    :param report: a report dict from runBenchmark
+    :param baseline: a report dict from an earlier run
+    :param tolerance: the allowed relative slowdown before a result counts as a regression, default 0.1
+    :param verbose: whether every matched result should be printed, default True
+    :return: a list of (result, baseline result, ratio) tuples for every regression
+    """
+    saved = {resultKey(r): r for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = saved.get(resultKey(result))
+        if old is None or old['median_ns'] == 0: continue
+        ratio = result['median_ns'] / old['median_ns']
+        regressed = ratio > 1 + tolerance
+        if regressed: regressions.append((result, old, ratio))
+        if verbose or regressed:
+            print(f'{"REGRESSION " if regressed else ""}{result["kind"]} {result["name"]} on '
+                  f'{result["size"]} {result["distribution"]}: {ratio:.3f}x baseline median')
+    return regressions
+
+
+# =================================================== HELPERS ===================================================
+
+
+def summarize(times, elements, peak):
+    """
+    reduces a list of trial times to the reported statistics.
+
+    :param times: trial times in nanoseconds
+    :param elements: the number of elements (or keys) handled per trial
+    :param peak: the peak traced memory of one run in bytes
+    :return: a result dict
+    """
+    median = float(np.median(times))
+    return {'trials': len(times), 'median_ns': median, 'p95_ns': float(np.percentile(times, 95)),
+            'min_ns': int(min(times)), 'throughput': elements / (median / 1e9) if median else None,
+            'peak_bytes': peak}
+
+
+def peakMemory(run, data):
+    """
+    measures the peak memory allocated during one untimed run, tracing slows the run down so it is kept
+    out of the trials.
+
+    :param run: a function taking the data
+    :param data: the input of the run
+    :return: the peak traced memory in bytes
+    """
+    tracemalloc.start()
+    try:
+        run(data)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def record(kind, name, dist, size, result, verbose):
+    """
+    labels a result dict and optionally prints it.
+
+    :return: the labelled result dict
+    """
+    result.update({'kind': kind, 'name': name, 'distribution': dist, 'size': size})
+    if verbose:
+        print(f'{kind} {name} on {size} {dist}: median {result["median_ns"] / 1e6:.3f} ms, '
+              f'p95 {result["p95_ns"] / 1e6:.3f} ms, {result["throughput"] or 0:.0f} elements/s'
+              + (f', peak {result["peak_bytes"]} bytes' if result['peak_bytes'] is not None else ''))
+    return result
+
+
+def resultKey(result):
+    """the fields that identify the same measurement across runs"""
+    return result['kind'], result['name'], result['distribution'], result['size']
+
+
+def environment(seed, warmup, trials):
+    """
+    collects what is needed to tell whether two reports are comparable.
+
+    :return: a metadata dict
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'timestamp': strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'python': sys.version.split()[0],
+            'numpy': np.__version__, 'platform': platform.platform(), 'seed': seed, 'warmup': warmup,
+            'trials': trials}
+
+
+# =========================================== DATA, FILE I/O, TESTING ===========================================
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='benchmark the sorts and searches')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--distributions', nargs='+', choices=list(DISTRIBUTIONS))
+    parser.add_argument('--sorts', nargs='*', choices=list(SORTS))
+    parser.add_argument('--searches', nargs='*', choices=list(SEARCHES))
+    parser.add_argument('--startup', nargs='*', choices=list(STARTUP), help='startup commands, none if empty')
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--trials', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='write the report to this json file')
+    parser.add_argument('--compare', help='flag regressions against this saved json report')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args(argv)
+    report = runBenchmark(args.sizes, args.distributions, args.sorts, args.searches, args.queries,
+                          args.warmup, args.trials, args.seed, startup_names=args.startup)
+    if args.out is not None:
+        with open(args.out, 'w') as f: json.dump(report, f, indent=1)
+        print(f'Results written to {args.out}')
+    if args.compare is not None:
+        with open(args.compare) as f: baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, False)
+        print(f'{len(regressions)} regression{"s" if len(regressions) != 1 else ""} found')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import weakref
+from collections import OrderedDict
+from itertools import count
+import numpy as np
+import searches as searches
+
+
+# the searches that can be cached, all take (dataset, key) and return (result, iterations)
+SEARCHES = {
+    'binarySearch': searches.binarySearch,
+    'binarySearchLeastIndex': searches.binarySearchLeastIndex,
+    'binarySearchRange': searches.binarySearchRange,
+    'exponentialSearch': searches.exponentialSearch,
+    'exponentialSearchRange': searches.exponentialSearchRange,
+    'interpolationSearch': searches.interpolationSearch,
+    'interpolationSearchLeastIndex': searches.interpolationSearchLeastIndex,
+    'interpolationSearchRange': searches.interpolationSearchRange,
+}
+
+
+# ==================================================== CACHE ====================================================
+
+
+class SearchCache:
+    """
+    bounded LRU cache in front of the searches, keyed on (dataset, dataset version, search kind, key).
+    every dataset gets a version number that is bumped by invalidate(), e.g. after it is re-sorted or mutated,
+    and automatically when its length or (for numpy arrays) its buffer changes. entries of old versions are
+    never returned again and age out of the LRU order.
+    """
+
+    def __init__(self, maxsize=4096):
+        """
+        :param maxsize: the maximum number of cached results, default 4096
+        """
+        if maxsize < 1: raise ValueError('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        # id(dataset) -> [version, reference, guard]. versions are drawn from one counter and never reused, so
+        # a new dataset that gets the id of a collected one can't see its stale entries
+        self.datasets = {}
+        self.versions = count()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def search(self, kind, dataset, key):
+        """
+        answers a search from the cache, running it on a miss.
+
+        :param kind: the name of the search, a key of SEARCHES
+        :param dataset: a sorted array
+        :param key: the value to be searched for
+        :return: the search result and the number of iterations the search took, 0 for a cached result
+        """
+        entry = (id(dataset), self.version(dataset), kind, key)
+        result = self.entries.get(entry)
+        if result is not None:
+            self.hits += 1
+            self.entries.move_to_end(entry)
+            return result[0], 0
+        self.misses += 1
+        result, iterations = SEARCHES[kind](dataset, key)
+        # results are stored in a tuple so cached None (not found) is told apart from a missing entry
+        self.entries[entry] = (result,)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return result, iterations
+
+    def wrap(self, kind):
+        """
+        :param kind: the name of the search, a key of SEARCHES
+        :return: a function with the same (dataset, key) signature and return value as the search, e.g. for
+            searches.testSearch
+        """
+        return lambda dataset, key: self.search(kind, dataset, key)
+
+    def invalidate(self, dataset):
+        """
+        marks every cached result for a dataset as stale, call after re-sorting or mutating it.
+
+        :param dataset: the array that changed
+        :return: None
+        """
+        tracked = self.datasets.get(id(dataset))
+        if tracked is not None:
+            tracked[0] = next(self.versions)
+            self.invalidations += 1
+
+    def clear(self):
+        """
+        drops every cached result, stops tracking every dataset (releasing the ones kept alive, see version())
+        and resets the statistics.
+
+        :return: None
+        """
+        self.entries.clear()
+        self.datasets.clear()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self):
+        """
+        :return: dict of hits, misses, hit rate, evictions, invalidations, current size and max size
+        """
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions, 'invalidations': self.invalidations, 'size': len(self.entries),
+                'maxsize': self.maxsize}
+
+    # ================================================= HELPERS =================================================
+
+    def version(self, dataset):
+        """
+        looks up the current version of a dataset, registering it on first use. the dataset is tracked by a
+        weak reference where possible so it is forgotten once collected, datasets that can't be weakly
+        referenced (e.g. lists) are kept alive by the cache instead.
+
+        :param dataset: a sorted array
+        :return: the version number
+        :rtype: int
+        """
+        guard = self.guard(dataset)
+        tracked = self.datasets.get(id(dataset))
+        if tracked is None:
+            try:
+                reference = weakref.ref(dataset, self.forget(id(dataset)))
+            except TypeError:
+                reference = dataset
+            tracked = self.datasets[id(dataset)] = [next(self.versions), reference, guard]
+        elif tracked[2] != guard:
+            tracked[0] = next(self.versions)
+            tracked[2] = guard
+            self.invalidations += 1
+        return tracked[0]
+
+    def forget(self, identity):
+        """
+        :param identity: the id of a tracked dataset
+        :return: a weakref callback that stops tracking the dataset once it is garbage collected
+        """
+        return lambda _: self.datasets.pop(identity, None)
+
+    @staticmethod
+    def guard(dataset):
+        """
+        :param dataset: a sorted array
+        :return: a cheap fingerprint that changes when the dataset is resized or its buffer is replaced
+        """
+        if isinstance(dataset, np.ndarray): return len(dataset), dataset.__array_interface__['data'][0]
+        return len(dataset), None
@@ -0,0 +1,443 @@
+from time import perf_counter
+import numpy as np
+import searches as searches
+import sorts as sorts
+from searches import NOT_FOUND
+
+
+# ================================================== CONTAINER ==================================================
+
+
+class SortedChunks:
+    """
+    mutable sorted multiset, LSM-style: a list of sorted chunks plus a small unsorted write buffer. inserts and
+    deletes are only queued; once the buffer fills (or before the next search) the queue is ordered as one
+    batch, deletes cancel the queued inserts of the same value that came before them, the surviving inserts are
+    merged into the chunks they fall in with sorts.mergeSorted and the surviving deletes are removed. chunks
+    that grow past twice the chunk size are split and chunks that shrink below a quarter of it are joined to a
+    neighbour, so no change ever re-sorts the whole collection. answers the same queries as the searches, with
+    indices into the sorted order of the whole collection.
+    """
+
+    def __init__(self, chunk=1 << 14, buffer=1 << 10, dtype=np.int64, argsort=sorts.radixArgsort):
+        """
+        :param chunk: the target number of elements per chunk, default 16384
+        :param buffer: the number of queued inserts and deletes that triggers a flush, default 1024
+        :param dtype: the dtype of the elements, default int64
+        :param argsort: the stable argsort used on each queued batch, returning (index, runtime), default
+            sorts.radixArgsort
+        """
+        if chunk < 4: raise ValueError('chunk must be at least 4')
+        self.chunk = chunk
+        self.buffer = buffer
+        self.dtype = np.dtype(dtype)
+        self.argsort = argsort
+        self.chunks = []
+        # the queue in arrival order: runs of single values with their signs (+1 insert, -1 delete) are kept in
+        # lists and moved into parts as arrays whenever an array is queued
+        self.values, self.signs, self.parts = [], [], []
+        self.pending = 0
+        self.inserted = 0
+        self.deleted = 0
+        self.missing = 0
+        self.flushes = 0
+        self.moved = 0
+        self.seconds = 0.0
+        self.reindex()
+
+    @classmethod
+    def fromSorted(cls, dataset, chunk=1 << 14, buffer=1 << 10, argsort=sorts.radixArgsort):
+        """
+        bulk loads an already sorted array by cutting it into chunks, without sorting or merging anything.
+
+        :param dataset: a sorted array, e.g. the output of any sort in sorts
+        :param chunk: the target number of elements per chunk, default 16384
+        :param buffer: the number of queued inserts and deletes that triggers a flush, default 1024
+        :param argsort: the stable argsort used on each queued batch, default sorts.radixArgsort
+        :return: the loaded container
+        :rtype: SortedChunks
+        """
+        dataset = np.asarray(dataset)
+        container = cls(chunk, buffer, dataset.dtype, argsort)
+        container.chunks = [dataset[i:i + chunk].copy() for i in range(0, len(dataset), chunk)]
+        container.reindex()
+        return container
+
+    def __len__(self):
+        self.flush()
+        return int(self.offsets[-1])
+
+    def __getitem__(self, index):
+        """
+        :param index: an index into the sorted order of the whole collection, negative indices count from the end
+        :return: the value at that index
+        """
+        self.flush()
+        size = int(self.offsets[-1])
+        if index < 0: index += size
+        if not 0 <= index < size: raise IndexError('index out of range')
+        i = int(np.searchsorted(self.offsets, index, 'right')) - 1
+        return self.chunks[i][index - self.offsets[i]]
+
+    def toArray(self):
+        """
+        :return: the whole collection as one sorted array
+        """
+        self.flush()
+        return np.concatenate(self.chunks) if self.chunks else np.empty(0, dtype=self.dtype)
+
+    # ================================================== UPDATE ==================================================
+
+    def insert(self, key):
+        """
+        queues one value for insertion.
+
+        :param key: the value to be inserted
+        :return: None
+        """
+        self.queue(key, 1)
+
+    def insertBatch(self, keys):
+        """
+        queues an array of values for insertion.
+
+        :param keys: an array of values to be inserted
+        :return: None
+        """
+        self.queueBatch(keys, 1)
+
+    def delete(self, key):
+        """
+        queues the removal of one occurrence of a value. values that are not in the collection at that point
+        of the queue are counted as missing and ignored.
+
+        :param key: the value to be removed
+        :return: None
+        """
+        self.queue(key, -1)
+
+    def deleteBatch(self, keys):
+        """
+        queues the removal of one occurrence per value of an array, so duplicates in keys remove duplicates.
+
+        :param keys: an array of values to be removed
+        :return: None
+        """
+        self.queueBatch(keys, -1)
+
+    def flush(self):
+        """
+        applies every queued change, with the same result as applying them one by one in arrival order.
+
+        :return: None
+        """
+        if not self.pending: return
+        start = perf_counter()
+        self.parts.append((np.array(self.values, dtype=self.dtype), np.array(self.signs, dtype=np.int64)))
+        values = np.concatenate([part[0] for part in self.parts])
+        signs = np.concatenate([part[1] for part in self.parts])
+        self.values, self.signs, self.parts = [], [], []
+        self.pending = 0
+        # a stable argsort groups equal values and keeps each group in arrival order
+        order, _ = self.argsort(values)
+        inserts, deletes, cancelled = netChanges(values[order], signs[order])
+        self.inserted += len(inserts) + cancelled
+        self.deleted += cancelled
+        # deletes left over after netting only ever target stored elements, so they go first
+        if len(deletes):
+            self.removeDeletes(deletes)
+            self.rebalance()
+            self.reindex()
+        if len(inserts):
+            self.mergeInserts(inserts)
+            self.rebalance()
+            self.reindex()
+        self.flushes += 1
+        self.seconds += perf_counter() - start
+
+    def stats(self):
+        """
+        :return: dict of elements, chunks, inserts, deletes, missing deletes, flushes, elements moved by merges
+            and the amortized cost per insert or delete in elements moved and in microseconds
+        """
+        changes = self.inserted + self.deleted
+        return {'elements': int(self.offsets[-1]), 'chunks': len(self.chunks), 'inserts': self.inserted,
+                'deletes': self.deleted, 'missing': self.missing, 'flushes': self.flushes, 'moved': self.moved,
+                'moved_per_change': self.moved / changes if changes else 0.0,
+                'us_per_change': 1e6 * self.seconds / changes if changes else 0.0}
+
+    # ================================================== SEARCH ==================================================
+
+    def binarySearch(self, key):
+        """
+        finds the greatest index at which the key occurs.
+
+        :param key: the value to be searched for
+        :return: the largest index at which the key is found/None if not found and the number of iterations the
+            search took
+        """
+        left, right, iterations = self.bounds(key, False)
+        return (right - 1 if right > left else None), iterations
+
+    def binarySearchLeastIndex(self, key):
+        """
+        finds the least index at which the key occurs.
+
+        :param key: the value to be searched for
+        :return: the least index at which the key is found/None if not found and the number of iterations the
+            search took
+        """
+        left, right, iterations = self.bounds(key, False)
+        return (left if right > left else None), iterations
+
+    def binarySearchRange(self, key):
+        """
+        finds the range of indices at which the key occurs.
+
+        :param key: the value to be searched for
+        :return: the (least, greatest) index tuple/None if not found and the number of iterations the search took
+        """
+        left, right, iterations = self.bounds(key, False)
+        return ((left, right - 1) if right > left else None), iterations
+
+    def exponentialSearch(self, key, lower=False):
+        """
+        the exponential form of binarySearch: inside the chunk holding the key the bound is galloped to from the
+        start of the chunk with searches.SearchCursor, so keys near the front of a chunk are found quickest.
+
+        :param key: the value to be searched for
+        :param lower: whether the least or greatest index should be found
+        :return: the largest (or least) index at which the key is found/None if not found and the number of
+            iterations the search took
+        """
+        left, right, iterations = self.bounds(key, True)
+        if right <= left: return None, iterations
+        return (left if lower else right - 1), iterations
+
+    def exponentialSearchRange(self, key):
+        """
+        the exponential form of binarySearchRange.
+
+        :param key: the value to be searched for
+        :return: the (least, greatest) index tuple/None if not found and the number of iterations the search took
+        """
+        left, right, iterations = self.bounds(key, True)
+        return ((left, right - 1) if right > left else None), iterations
+
+    def binarySearchRangeBatch(self, keys):
+        """
+        batch form of binarySearchRange, each chunk is searched once for all the keys that fall in it.
+
+        :param keys: an array of values to be searched for
+        :return: a (len(keys), 2) array of (least, greatest) index pairs, both NOT_FOUND for missing keys,
+            and the total number of iterations
+        """
+        self.flush()
+        keys = np.asarray(keys)
+        lower, iterations = self.boundsBatch(keys, False)
+        upper, temp = self.boundsBatch(keys, True)
+        found = upper > lower
+        return (np.stack((np.where(found, lower, NOT_FOUND), np.where(found, upper - 1, NOT_FOUND)), axis=1),
+                iterations + temp)
+
+    # ================================================= HELPERS =================================================
+
+    def queue(self, key, sign):
+        """
+        queues one change and flushes once the write buffer is full.
+
+        :param key: the value to be inserted or removed
+        :param sign: 1 for an insert, -1 for a delete
+        :return: None
+        """
+        self.values.append(key)
+        self.signs.append(sign)
+        self.pending += 1
+        if self.pending >= self.buffer: self.flush()
+
+    def queueBatch(self, keys, sign):
+        """
+        queues an array of changes of one kind and flushes once the write buffer is full.
+
+        :param keys: an array of values to be inserted or removed
+        :param sign: 1 for inserts, -1 for deletes
+        :return: None
+        """
+        keys = np.asarray(keys, dtype=self.dtype)
+        if self.values:
+            self.parts.append((np.array(self.values, dtype=self.dtype), np.array(self.signs, dtype=np.int64)))
+            self.values, self.signs = [], []
+        self.parts.append((keys, np.full(len(keys), sign, dtype=np.int64)))
+        self.pending += len(keys)
+        if self.pending >= self.buffer: self.flush()
+
+    def mergeInserts(self, keys):
+        """
+        routes a sorted batch to the chunks by their first values and merges each part into its chunk.
+
+        :param keys: a sorted array of values to be inserted
+        :return: None
+        """
+        if not self.chunks:
+            self.chunks = [keys]
+            self.moved += len(keys)
+            return
+        # a key goes to the last chunk whose first value is not greater than it, or to the first chunk
+        cuts = [0] + np.searchsorted(keys, self.firsts[1:], 'left').tolist() + [len(keys)]
+        for i, (lo, hi) in enumerate(zip(cuts[:-1], cuts[1:])):
+            if hi == lo: continue
+            chunk = self.chunks[i]
+            out = np.empty(len(chunk) + hi - lo, dtype=self.dtype)
+            self.chunks[i] = sorts.mergeSorted(chunk, keys[lo:hi], out)
+            self.moved += len(out)
+
+    def removeDeletes(self, keys):
+        """
+        removes one occurrence per value of a sorted batch. a run of equal values can span chunks, so the
+        chunks are visited from the last one back and values a chunk can't satisfy are carried to the one before.
+
+        :param keys: a sorted array of values to be removed
+        :return: None
+        """
+        if not self.chunks:
+            self.missing += len(keys)
+            return
+        cuts = [0] + np.searchsorted(keys, self.firsts[1:], 'left').tolist() + [len(keys)]
+        carry = keys[:0]
+        for i in range(len(self.chunks) - 1, -1, -1):
+            part = np.concatenate((keys[cuts[i]:cuts[i + 1]], carry))
+            if len(part) == 0: continue
+            chunk = self.chunks[i]
+            # the nth equal value removes the nth occurrence counted from the end of the run
+            rank = np.arange(len(part)) - np.searchsorted(part, part, 'left')
+            positions = np.searchsorted(chunk, part, 'right') - 1 - rank
+            hit = (positions >= 0) & (chunk[np.maximum(positions, 0)] == part)
+            keep = np.ones(len(chunk), dtype=bool)
+            keep[positions[hit]] = False
+            self.chunks[i] = chunk[keep]
+            self.moved += len(chunk)
+            self.deleted += int(np.count_nonzero(hit))
+            left = part[~hit]
+            # only values equal to this chunk's first value can still occur in an earlier chunk
+            carry = left[left == chunk[0]]
+            self.missing += len(left) - len(carry)
+        self.missing += len(carry)
+
+    def rebalance(self):
+        """
+        drops empty chunks, joins chunks below a quarter of the chunk size to their left neighbour and splits
+        chunks above twice the chunk size into pieces of about the chunk size.
+
+        :return: None
+        """
+        chunks = []
+        for chunk in self.chunks:
+            if len(chunk) == 0: continue
+            if chunks and (len(chunk) < self.chunk >> 2 or len(chunks[-1]) < self.chunk >> 2):
+                # adjacent chunks are in order, so joining them is a concatenation
+                chunk = np.concatenate((chunks.pop(), chunk))
+                self.moved += len(chunk)
+            if len(chunk) > 2 * self.chunk:
+                pieces = -(-len(chunk) // self.chunk)
+                chunks.extend(np.array_split(chunk, pieces))
+            else:
+                chunks.append(chunk)
+        self.chunks = chunks
+
+    def reindex(self):
+        """
+        rebuilds the fence arrays: the first and last value of every chunk and the global offset of each chunk.
+
+        :return: None
+        """
+        self.firsts = np.array([chunk[0] for chunk in self.chunks], dtype=self.dtype)
+        self.lasts = np.array([chunk[-1] for chunk in self.chunks], dtype=self.dtype)
+        self.offsets = np.zeros(len(self.chunks) + 1, dtype=np.int64)
+        np.cumsum([len(chunk) for chunk in self.chunks], out=self.offsets[1:])
+
+    def bounds(self, key, gallop):
+        """
+        finds the global lower and upper bound of a key. the lower bound lies in the first chunk whose last value
+        is not less than the key and the upper bound in the last chunk whose first value is not greater than it.
+
+        :param key: the value to be searched for
+        :param gallop: whether the chunks are searched with a galloping searches.SearchCursor instead of bisection
+        :return: the lower bound, the upper bound and the number of iterations taken
+        """
+        self.flush()
+        iterations = 2 * max(1, len(self.chunks).bit_length())
+        first = int(np.searchsorted(self.lasts, key, 'left'))
+        last = int(np.searchsorted(self.firsts, key, 'right')) - 1
+        if first > last:
+            # the key falls between two chunks (or past either end), offsets[len(chunks)] is the size
+            bound = int(self.offsets[first])
+            return bound, bound, iterations
+        lower, temp = self.chunkBound(first, key, False, gallop)
+        iterations += temp
+        upper, temp = self.chunkBound(last, key, True, gallop)
+        return lower, upper, iterations + temp
+
+    def chunkBound(self, i, key, upper, gallop):
+        """
+        :param i: the index of the chunk
+        :param key: the value to be searched for
+        :param upper: whether to find the upper bound instead of the lower bound
+        :param gallop: whether to gallop from the start of the chunk instead of bisecting it
+        :return: the global bound and the number of iterations taken
+        """
+        chunk = self.chunks[i]
+        if gallop: bound, iterations = searches.SearchCursor(chunk).gallop(key, upper)
+        else:
+            bound = int(np.searchsorted(chunk, key, 'right' if upper else 'left'))
+            iterations = max(1, len(chunk).bit_length())
+        return int(self.offsets[i]) + bound, iterations
+
+    def boundsBatch(self, keys, upper):
+        """
+        batch form of the global bounds, grouped by chunk so each chunk is handed to searches.boundsBatch once.
+
+        :param keys: an array of values to be searched for
+        :param upper: whether to find upper bounds instead of lower bounds
+        :return: the array of bounds and the number of iterations taken
+        """
+        if not self.chunks: return np.zeros(len(keys), dtype=np.intp), 0
+        if upper: owners = np.maximum(np.searchsorted(self.firsts, keys, 'right') - 1, 0)
+        else: owners = np.minimum(np.searchsorted(self.lasts, keys, 'left'), len(self.chunks) - 1)
+        iterations = 2 * len(keys) * max(1, len(self.chunks).bit_length())
+        result = np.empty(len(keys), dtype=np.intp)
+        for i in np.unique(owners).tolist():
+            mask = owners == i
+            lower, higher, temp = searches.boundsBatch(self.chunks[i], keys[mask])
+            result[mask] = self.offsets[i] + (higher if upper else lower)
+            iterations += temp // 2
+        return result, iterations
+
+
+# =================================================== HELPERS ===================================================
+
+
+def netChanges(values, signs):
+    """
+    nets a queue of changes per value. within each run of equal values, taken in arrival order, a delete
+    cancels an earlier insert that is still standing; a delete with none standing has to remove an element
+    already stored. the standing balance only drops below zero on such deletes, so their number is the
+    lowest the running sum of the signs reaches.
+
+    :param values: the queued values, grouped so equal values are adjacent and in arrival order
+    :param signs: the matching signs, 1 for an insert and -1 for a delete
+    :return: the sorted array of inserts left to merge, the sorted array of deletes left to apply and the
+        number of deletes that cancelled a queued insert
+    """
+    if len(values) == 0: return values, values, 0
+    starts = np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))
+    sizes = np.diff(np.append(starts, len(values)))
+    running = np.cumsum(signs)
+    # the running sum restarted at every run
+    base = np.concatenate(([0], running[starts[1:] - 1]))
+    running -= np.repeat(base, sizes)
+    unmatched = np.maximum(0, -np.minimum.reduceat(running, starts))
+    removals = np.add.reduceat(signs < 0, starts)
+    additions = sizes - removals
+    cancelled = removals - unmatched
+    unique = values[starts]
+    return np.repeat(unique, additions - cancelled), np.repeat(unique, unmatched), int(cancelled.sum())
@@ -0,0 +1,370 @@
+import io
+import struct
+import zlib
+from itertools import islice
+import numpy as np
+
+
+# binary dataset layout: a fixed 64 byte little-endian header followed by the raw array.
+# magic, format version, flags, dtype string (e.g. '<i8'), number of elements, crc32 of the data
+HEADER = struct.Struct('<4sBB2x8sQI36x')
+MAGIC = b'ALGD'
+VERSION = 1
+# header flags
+SORTED = 1
+CHECKSUM = 2
+
+
+# ================================================== BINARY ==================================================
+
+
+def writeBinary(file, dataset, is_sorted=None, checksum=True):
+    """
+    bulk writes an array to a binary dataset file in a single call, header first.
+
+    :param file: string - the relative path of the output file
+    :param dataset: the array to be written
+    :param is_sorted: value of the sortedness flag - optional, checked from the data if None
+    :param checksum: whether a crc32 of the data is stored in the header, default True
+    :return: None
+    """
+    dataset = np.ascontiguousarray(dataset)
+    if is_sorted is None: is_sorted = isSorted(dataset)
+    crc = zlib.crc32(dataset.data) if checksum else 0
+    with open(file, 'wb') as f:
+        f.write(packHeader(dataset.dtype, len(dataset), is_sorted, checksum, crc))
+        dataset.tofile(f)
+
+
+def createBinary(file, dtype, length):
+    """
+    creates a binary dataset file of a fixed length and maps it for writing, so results can be produced
+    directly into the file. the flags are left clear, call refreshHeader() once the data is final.
+
+    :param file: string - the relative path of the output file
+    :param dtype: the dtype of the elements
+    :param length: the number of elements
+    :return: a writable memory-mapped array over the data
+    :rtype: np.memmap
+    """
+    dtype = np.dtype(dtype)
+    with open(file, 'wb') as f:
+        f.write(packHeader(dtype, length, False, False, 0))
+        f.truncate(HEADER.size + dtype.itemsize * length)
+    if length == 0: return np.empty(0, dtype=dtype)
+    return np.memmap(file, dtype=dtype, mode='r+', offset=HEADER.size, shape=(length,))
+
+
+def readBinary(file, mode='r', verify=False):
+    """
+    maps a binary dataset file without parsing it. the result is an ndarray and can be passed straight to
+    the sorts (with mode 'r+' or 'c') and searches.
+
+    :param file: string - the relative path of the dataset file
+    :param mode: np.memmap mode, 'r' read-only, 'r+' in place, 'c' copy-on-write, default 'r'
+    :param verify: whether the stored checksum should be checked, default False
+    :return: the memory-mapped array, the header dict
+    """
+    header = readHeader(file)
+    if header['length'] == 0: return np.empty(0, dtype=header['dtype']), header
+    data = np.memmap(file, dtype=header['dtype'], mode=mode, offset=HEADER.size, shape=(header['length'],))
+    if verify and header['checksum'] is not None and crc32(data) != header['checksum']:
+        raise ValueError(f'checksum mismatch in {file}')
+    return data, header
+
+
+def writeChunks(file, chunks, dtype, checksum=True):
+    """
+    streams arrays into a binary dataset file in bounded memory. the header is written last, once the
+    length, sortedness and checksum are known.
+
+    :param file: string - the relative path of the output file
+    :param chunks: an iterable of arrays
+    :param dtype: the dtype of the elements, chunks are cast to it
+    :param checksum: whether a crc32 of the data is stored in the header, default True
+    :return: the header dict of the new file
+    """
+    dtype = np.dtype(dtype)
+    length, crc, is_sorted, last = 0, 0, True, None
+    with open(file, 'wb') as f:
+        f.write(bytes(HEADER.size))
+        for data in chunks:
+            if len(data) == 0: continue
+            data = np.ascontiguousarray(data, dtype=dtype)
+            is_sorted = is_sorted and isSorted(data) and (last is None or last <= data[0])
+            last = data[-1]
+            if checksum: crc = zlib.crc32(data.data, crc)
+            data.tofile(f)
+            length += len(data)
+        f.seek(0)
+        f.write(packHeader(dtype, length, is_sorted, checksum, crc))
+    return readHeader(file)
+
+
+def readBinaryChunks(file, chunk=1 << 20):
+    """
+    streams a binary dataset as writable arrays of bounded size. paths are memory mapped, file objects (e.g.
+    stdin, which can't be mapped) are read sequentially, header first.
+
+    :param file: string - the relative path of the dataset file, or a file object opened in binary mode
+    :param chunk: the maximum number of elements per array, default 1048576
+    :return: the header dict, a generator of arrays
+    """
+    if not hasattr(file, 'read'):
+        data, header = readBinary(file)
+        return header, (np.array(data[i:i + chunk]) for i in range(0, len(data), chunk))
+    header = parseHeader(readExactly(file, HEADER.size), getattr(file, 'name', 'stream'))
+
+    def chunks():
+        dtype, remaining = header['dtype'], header['length']
+        while remaining:
+            count = min(chunk, remaining)
+            yield np.frombuffer(bytearray(readExactly(file, count * dtype.itemsize)), dtype=dtype)
+            remaining -= count
+
+    return header, chunks()
+
+
+def writeBinaryStream(f, chunks, dtype, length, is_sorted=False):
+    """
+    streams arrays to a file object that can't seek back, e.g. stdout. the header goes first, so the length
+    has to be known in advance and no checksum is stored.
+
+    :param f: a file object opened in binary mode
+    :param chunks: an iterable of arrays holding length elements in total
+    :param dtype: the dtype of the elements, chunks are cast to it
+    :param length: the total number of elements
+    :param is_sorted: value of the sortedness flag, default False
+    :return: None
+    """
+    dtype = np.dtype(dtype)
+    f.write(packHeader(dtype, length, is_sorted, False, 0))
+    for data in chunks:
+        f.write(np.ascontiguousarray(data, dtype=dtype).data)
+
+
+def readHeader(file):
+    """
+    reads and validates the header of a binary dataset file.
+
+    :param file: string - the relative path of the dataset file
+    :return: dict with the dtype, length, sorted flag and checksum (None if not stored)
+    """
+    with open(file, 'rb') as f:
+        raw = f.read(HEADER.size)
+    return parseHeader(raw, file)
+
+
+def parseHeader(raw, file):
+    """
+    validates and unpacks a raw header.
+
+    :param raw: the first bytes of a binary dataset
+    :param file: the name of the dataset, for error messages
+    :return: dict with the dtype, length, sorted flag and checksum (None if not stored)
+    """
+    if len(raw) < HEADER.size: raise ValueError(f'{file} is too short to be a binary dataset')
+    magic, version, flags, dtype, length, crc = HEADER.unpack(raw)
+    if magic != MAGIC: raise ValueError(f'{file} is not a binary dataset')
+    if version > VERSION: raise ValueError(f'{file} has unsupported format version {version}')
+    return {'dtype': np.dtype(dtype.rstrip(b'\0').decode()), 'length': length, 'sorted': bool(flags & SORTED),
+            'checksum': crc if flags & CHECKSUM else None}
+
+
+def refreshHeader(file, checksum=True):
+    """
+    recomputes the sortedness flag and checksum of a binary dataset file, e.g. after it was sorted in place.
+
+    :param file: string - the relative path of the dataset file
+    :param checksum: whether a crc32 of the data is stored, default True
+    :return: the new header dict
+    """
+    data, header = readBinary(file)
+    raw = packHeader(header['dtype'], header['length'], isSorted(data), checksum, crc32(data) if checksum else 0)
+    del data
+    with open(file, 'r+b') as f:
+        f.write(raw)
+    return readHeader(file)
+
+
+# ==================================================== TEXT ====================================================
+
+
+def readTextChunks(file, chunk=1 << 20, dtype=np.int64):
+    """
+    streams a text dataset (one number per line, as written by sorts.genData or writeText) as arrays of bounded
+    size, so old files can be processed without loading them whole. lines are parsed as floats for a floating
+    point dtype and as integers otherwise.
+
+    :param file: string - the relative path of the text file, or a file object such as sys.stdin.buffer
+    :param chunk: the maximum number of elements per array, default 1048576
+    :param dtype: the dtype of the arrays, default int64
+    :return: a generator of arrays
+    """
+    if hasattr(file, 'read'):
+        yield from textChunks(file, chunk, dtype)
+        return
+    with open(file, 'rb') as f:
+        yield from textChunks(f, chunk, dtype)
+
+
+def writeText(f, chunks):
+    """
+    writes arrays to a file object one element per line, a chunk at a time.
+
+    :param f: a file object opened in binary mode
+    :param chunks: an iterable of arrays
+    :return: the number of bytes written
+    """
+    written = 0
+    for data in chunks:
+        written += f.write(''.join(f'{value}\n' for value in data.tolist()).encode())
+    return written
+
+
+def textToBinary(infile, outfile, dtype=np.int64, chunk=1 << 20, checksum=True):
+    """
+    converts a text dataset to the binary format in bounded memory.
+
+    :param infile: string - the relative path of the text file
+    :param outfile: string - the relative path of the binary file
+    :param dtype: the dtype of the elements, default int64
+    :param chunk: the number of elements converted at once, default 1048576
+    :param checksum: whether a crc32 of the data is stored in the header, default True
+    :return: the header dict of the new file
+    """
+    return writeChunks(outfile, readTextChunks(infile, chunk, dtype), dtype, checksum)
+
+
+def binaryToText(infile, outfile, chunk=1 << 20):
+    """
+    converts a binary dataset back to the text format, one element per line, in bounded memory.
+
+    :param infile: string - the relative path of the binary file
+    :param outfile: string - the relative path of the text file
+    :param chunk: the number of elements converted at once, default 1048576
+    :return: None
+    """
+    data, _ = readBinary(infile)
+    with open(outfile, 'wb') as f:
+        writeText(f, (data[i:i + chunk] for i in range(0, len(data), chunk)))
+
+
+# =================================================== HELPERS ===================================================
+
+
+def textChunks(f, chunk, dtype):
+    """
+    :param f: a file object opened in binary mode, one number per line
+    :return: a generator of arrays of at most chunk elements
+    """
+    parse = float if np.dtype(dtype).kind == 'f' else int
+    while True:
+        # fromiter grows the array directly from the lines, no intermediate list is built
+        data = np.fromiter(map(parse, islice(f, chunk)), dtype=dtype)
+        if len(data) == 0: return
+        yield data
+
+
+def readExactly(f, size):
+    """
+    reads exactly size bytes from a file object, which a pipe may deliver in several pieces.
+
+    :param f: a file object opened in binary mode
+    :param size: the number of bytes to read
+    :return: the bytes read
+    :rtype: bytes
+    """
+    parts = []
+    while size:
+        part = f.read(size)
+        if not part: raise ValueError('binary dataset is truncated')
+        parts.append(part)
+        size -= len(part)
+    return b''.join(parts)
+
+
+def peekStream(f, size):
+    """
+    looks at the first size bytes of a stream without consuming them. peek() may return fewer bytes than asked
+    for, e.g. when a pipe delivers them in several pieces, so a short peek falls back to reading them in a
+    loop and putting them back in front of the stream.
+
+    :param f: a buffered file object opened in binary mode, e.g. sys.stdin.buffer
+    :param size: the number of bytes wanted
+    :return: the first size bytes (fewer only if the stream ends sooner), a file object that reads the stream
+        from its start
+    """
+    head = f.peek(size)[:size]
+    if len(head) == size: return head, f
+    parts, remaining = [], size
+    while remaining:
+        part = f.read(remaining)
+        if not part: break
+        parts.append(part)
+        remaining -= len(part)
+    head = b''.join(parts)
+    return head, io.BufferedReader(PrefixedStream(head, f))
+
+
+class PrefixedStream(io.RawIOBase):
+    """
+    a raw stream that returns some bytes already read from a stream before the rest of it, see peekStream().
+    """
+
+    def __init__(self, head, f):
+        """
+        :param head: the bytes returned first
+        :param f: the file object read after them
+        """
+        self.head = head
+        self.f = f
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if not self.head: return self.f.readinto(b)
+        count = min(len(b), len(self.head))
+        b[:count] = self.head[:count]
+        self.head = self.head[count:]
+        return count
+
+
+def packHeader(dtype, length, is_sorted, checksum, crc):
+    """
+    :return: the packed 64 byte header
+    :rtype: bytes
+    """
+    flags = (SORTED if is_sorted else 0) | (CHECKSUM if checksum else 0)
+    return HEADER.pack(MAGIC, VERSION, flags, np.dtype(dtype).str.encode(), length, crc)
+
+
+def crc32(dataset, chunk=1 << 22):
+    """
+    computes the crc32 of an array in chunks, so a mapped file is not read into memory at once.
+
+    :param dataset: a contiguous array
+    :param chunk: the number of elements hashed at once, default 4194304
+    :return: the checksum
+    :rtype: int
+    """
+    crc = 0
+    for i in range(0, len(dataset), chunk):
+        crc = zlib.crc32(np.ascontiguousarray(dataset[i:i + chunk]).data, crc)
+    return crc
+
+
+def isSorted(dataset, chunk=1 << 22):
+    """
+    checks sortedness in overlapping chunks, so a mapped file is not read into memory at once.
+
+    :param dataset: an array
+    :param chunk: the number of elements compared at once, default 4194304
+    :return: whether the array is in non-decreasing order
+    :rtype: bool
+    """
+    for i in range(0, max(1, len(dataset) - 1), chunk):
+        part = dataset[i:i + chunk + 1]
+        if not np.all(part[:-1] <= part[1:]): return False
+    return True
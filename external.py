@@ -0,0 +1,161 @@
+import heapq
+import os
+import tempfile
+from itertools import islice
+from time import time
+import numpy as np
+import sorts as sorts
+
+
+# peak bytes per element of sorting a chunk with sorts.radixVectorized, measured with tracemalloc on int64 text:
+# the parsed array (over-allocated while it grows), the key copy, the ping-pong buffer, the digits and the argsort order
+SORT_BYTES = 64
+# peak bytes per element buffered as text: a python int in a list plus its formatted line and the joined block
+LINE_BYTES = 192
+
+# ==================================================== SORT ====================================================
+
+
+def externalSort(infile, outfile, memory=2 ** 26, fan_in=16, sort=sorts.radixVectorized, tmpdir=None):
+    """
+    out-of-core mergesort for files of one integer per line (the format written by sorts.genData).
+    the input is read in chunks that fit in the memory budget, each chunk is sorted with an in-memory
+    sort and spilled to a temporary run file, then the runs are k-way heap merged into the output file.
+    if there are more runs than the fan-in allows, intermediate merge passes are done first. chunks are
+    sized by the SORT_BYTES footprint of the sort, a merge splits the budget evenly between the read buffers
+    of its fan_in runs and the output buffer, and that share also bounds the blocks formatted per write.
+
+    :param infile: string - the relative path of the input file
+    :param outfile: string - the relative path of the output file
+    :param memory: the memory budget in bytes, default 64MiB
+    :param fan_in: the maximum number of runs merged at once, default 16
+    :param sort: an in-memory sort returning (array, runtime), default sorts.radixVectorized
+    :param tmpdir: directory for the run files - optional, system default if None
+    :return: the output path, the runtime of the sort and a list of per-pass stats
+        (dicts with the pass number, number of runs, bytes read and bytes written)
+    """
+    if fan_in < 2: raise ValueError('fan_in must be at least 2')
+    start_time = time()
+    passes = []
+    # the chunk has to hold both the array and the scratch space of the sort
+    chunk = max(1, memory // SORT_BYTES)
+    # the read buffer of every run and the output buffer of a merge, at least 2 bytes: open() takes 1 for line buffering
+    share = max(2, memory // (fan_in + 1))
+    block = max(1, share // LINE_BYTES)
+    with tempfile.TemporaryDirectory(dir=tmpdir) as workdir:
+        runs, bytes_read, bytes_written = spillRuns(infile, workdir, chunk, sort, block)
+        passes.append({'pass': 0, 'runs': len(runs), 'read': bytes_read, 'written': bytes_written})
+        # merge groups of fan_in runs until a single final merge is possible
+        while len(runs) > fan_in:
+            merged = []
+            bytes_read = bytes_written = 0
+            for i in range(0, len(runs), fan_in):
+                path = os.path.join(workdir, f'run{len(passes)}_{i // fan_in}.txt')
+                r, w = mergeRuns(runs[i:i + fan_in], path, block, share)
+                bytes_read += r
+                bytes_written += w
+                for run in runs[i:i + fan_in]: os.remove(run)
+                merged.append(path)
+            runs = merged
+            passes.append({'pass': len(passes), 'runs': len(runs), 'read': bytes_read, 'written': bytes_written})
+        bytes_read, bytes_written = mergeRuns(runs, outfile, block, share)
+        passes.append({'pass': len(passes), 'runs': 1, 'read': bytes_read, 'written': bytes_written})
+    end_time = time()
+    return outfile, end_time - start_time, passes
+
+
+# =================================================== HELPERS ===================================================
+
+
+def spillRuns(infile, workdir, chunk, sort, block=1 << 16):
+    """
+    reads the input file in chunks of at most chunk elements, sorts each chunk and writes it to a run file.
+
+    :param infile: string - the relative path of the input file
+    :param workdir: the directory the run files are written to
+    :param chunk: the maximum number of elements held in memory at once
+    :param sort: an in-memory sort returning (array, runtime)
+    :param block: the number of elements formatted at once when writing, default 65536
+    :return: a list of run file paths, the bytes read and the bytes written
+    """
+    runs = []
+    bytes_written = 0
+    with open(infile, 'rb') as f:
+        while True:
+            # fromiter grows the array directly from the lines, no intermediate list is built
+            data = np.fromiter(map(int, islice(f, chunk)), dtype=np.int64)
+            if len(data) == 0: break
+            data, _ = sort(data)
+            path = os.path.join(workdir, f'run0_{len(runs)}.txt')
+            with open(path, 'wb') as out:
+                bytes_written += writeBlock(out, data, block)
+            runs.append(path)
+        bytes_read = f.tell()
+    return runs, bytes_read, bytes_written
+
+
+def mergeRuns(runs, outfile, block=1 << 16, buffering=-1):
+    """
+    k-way heap merge of sorted run files into a single sorted file.
+
+    :param runs: a list of paths to sorted run files
+    :param outfile: string - the path of the merged output file
+    :param block: the number of elements buffered before each write, default 65536
+    :param buffering: the read buffer size in bytes of every run, default -1 (the io default)
+    :return: the bytes read and the bytes written
+    """
+    files = [open(run, 'rb', buffering=buffering) for run in runs]
+    bytes_written = 0
+    try:
+        with open(outfile, 'wb') as out:
+            buffer = []
+            for value in heapq.merge(*[map(int, f) for f in files]):
+                buffer.append(value)
+                if len(buffer) == block:
+                    bytes_written += writeBlock(out, buffer, block)
+                    buffer.clear()
+            if buffer: bytes_written += writeBlock(out, buffer, block)
+        bytes_read = sum(f.tell() for f in files)
+    finally:
+        for f in files: f.close()
+    return bytes_read, bytes_written
+
+
+def writeBlock(f, dataset, block=1 << 16):
+    """
+    writes a block of integers to a binary file object, one per line, in slices of bounded size.
+
+    :param f: a file object opened in binary mode
+    :param dataset: the array or list to be written
+    :param block: the number of elements formatted at once, default 65536
+    :return: the number of bytes written
+    """
+    written = 0
+    for i in range(0, len(dataset), block):
+        part = dataset[i:i + block]
+        if isinstance(part, np.ndarray): part = part.tolist()
+        written += f.write(('\n'.join(map(str, part)) + '\n').encode())
+    return written
+
+
+# =========================================== DATA, FILE I/O, TESTING ===========================================
+
+
+def testExternalSort(infile, outfile, memory=2 ** 26, fan_in=16, nl=True):
+    """
+    simple test for the external sort, reports the bytes moved in each pass.
+
+    :param infile: string - the relative path of the input file
+    :param outfile: string - the relative path of the output file
+    :param memory: the memory budget in bytes, default 64MiB
+    :param fan_in: the maximum number of runs merged at once, default 16
+    :param nl: whether a newline should be printed after the sort, default True
+    :return: None
+    """
+    print(f'Starting external sort on {infile} with a budget of {memory} bytes')
+    _, runtime, passes = externalSort(infile, outfile, memory, fan_in)
+    for p in passes:
+        print(f' - pass {p["pass"]}: {p["runs"]} run{"s" if p["runs"] != 1 else ""}, '
+              f'{p["read"]} bytes read, {p["written"]} bytes written')
+    print(f'External sort completed in {runtime} {"seconds" if runtime > 1 else "second"}, results in {outfile}')
+    if nl: print()
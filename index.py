@@ -0,0 +1,219 @@
+import numpy as np
+from searches import NOT_FOUND
+
+
+# ==================================================== INDEX ====================================================
+
+
+class EytzingerIndex:
+    """
+    build-once static search index over a sorted array. the values are re-laid out in eytzinger (breadth-first
+    binary tree) order, so the first levels of every search share the same few cache lines and each probe's
+    children sit next to each other. an optional lookup table holding the top levels of the tree lets a
+    search skip straight to a subtree. answers the same queries as the binary searches in searches.
+    """
+
+    def __init__(self, dataset=None, levels=10):
+        """
+        :param dataset: a sorted array, e.g. the output of any sort in sorts - optional, for load()
+        :param levels: the number of tree levels copied into the top-level lookup table, 0 for none, default 10
+        """
+        if dataset is None: return
+        dataset = np.asarray(dataset)
+        self.size = size = len(dataset)
+        self.layout, self.rank = eytzinger(dataset)
+        self.levels = levels if 0 < levels and (1 << levels) - 1 <= size else 0
+        self.table = np.sort(self.layout[1:1 << self.levels]) if self.levels else None
+
+    # ================================================== SEARCH ==================================================
+
+    def binarySearch(self, key):
+        """
+        finds the greatest index at which the key occurs in the original sorted array.
+
+        :param key: the value to be searched for
+        :return: the largest index at which the key is found/None if not found and the number of iterations the
+            search took
+        """
+        lower, iterations = self.descend(key, False)
+        upper, temp = self.descend(key, True)
+        iterations += temp
+        lower, upper = self.rank[lower], self.rank[upper]
+        return (int(upper) - 1 if upper > lower else None), iterations
+
+    def binarySearchLeastIndex(self, key):
+        """
+        finds the least index at which the key occurs in the original sorted array.
+
+        :param key: the value to be searched for
+        :return: the least index at which the key is found/None if not found and the number of iterations the
+            search took
+        """
+        node, iterations = self.descend(key, False)
+        return (int(self.rank[node]) if node and self.layout[node] == key else None), iterations
+
+    def binarySearchRange(self, key):
+        """
+        finds the range of indices at which the key occurs in the original sorted array.
+
+        :param key: the value to be searched for
+        :return: the (least, greatest) index tuple/None if not found and the number of iterations the search took
+        """
+        lower, iterations = self.descend(key, False)
+        upper, temp = self.descend(key, True)
+        iterations += temp
+        lower, upper = int(self.rank[lower]), int(self.rank[upper])
+        return ((lower, upper - 1) if upper > lower else None), iterations
+
+    # ================================================== BATCH ==================================================
+
+    def binarySearchBatch(self, keys):
+        """
+        batch form of binarySearch.
+
+        :param keys: an array of values to be searched for
+        :return: array of the largest index at which each key is found/NOT_FOUND and the total number of iterations
+        """
+        lower, upper, iterations = self.boundsBatch(keys)
+        return np.where(upper > lower, upper - 1, NOT_FOUND), iterations
+
+    def binarySearchLeastIndexBatch(self, keys):
+        """
+        batch form of binarySearchLeastIndex.
+
+        :param keys: an array of values to be searched for
+        :return: array of the least index at which each key is found/NOT_FOUND and the total number of iterations
+        """
+        lower, upper, iterations = self.boundsBatch(keys)
+        return np.where(upper > lower, lower, NOT_FOUND), iterations
+
+    def binarySearchRangeBatch(self, keys):
+        """
+        batch form of binarySearchRange.
+
+        :param keys: an array of values to be searched for
+        :return: a (len(keys), 2) array of (least, greatest) index pairs, both NOT_FOUND for missing keys,
+            and the total number of iterations
+        """
+        lower, upper, iterations = self.boundsBatch(keys)
+        found = upper > lower
+        return np.stack((np.where(found, lower, NOT_FOUND), np.where(found, upper - 1, NOT_FOUND)), axis=1), iterations
+
+    # ================================================= HELPERS =================================================
+
+    def descend(self, key, right):
+        """
+        walks the tree from the root (or from the lookup table) down to a leaf. the path taken is kept in the bits
+        of the node number, so the answer is recovered by dropping the trailing right turns and the last left turn.
+
+        :param key: the value to be searched for
+        :param right: whether to find the first value greater than the key (upper bound) instead of the first
+            value not less than it (lower bound)
+        :return: the layout position of the bound, 0 if it is past the end, and the number of iterations taken
+        """
+        layout, size = self.layout, self.size
+        iterations = 0
+        node = 1
+        if self.table is not None:
+            node = len(self.table) + 1 + int(np.searchsorted(self.table, key, 'right' if right else 'left'))
+            iterations += self.levels
+        while node <= size:
+            iterations += 1
+            node = 2 * node + int(layout[node] <= key if right else layout[node] < key)
+        node >>= (~node & (node + 1)).bit_length()
+        return node, iterations
+
+    def boundsBatch(self, keys):
+        """
+        vectorized descent of every key at once, one tree level per step.
+
+        :param keys: an array of values to be searched for
+        :return: the array of lower bounds, the array of upper bounds and the number of iterations taken
+        """
+        keys = np.asarray(keys)
+        lower, iterations = self.descendBatch(keys, False)
+        upper, temp = self.descendBatch(keys, True)
+        return self.rank[lower], self.rank[upper], iterations + temp
+
+    def descendBatch(self, keys, right):
+        """
+        batch form of descend.
+
+        :param keys: an array of values to be searched for
+        :param right: whether to find upper bounds instead of lower bounds
+        :return: the array of layout positions of the bounds and the number of iterations taken
+        """
+        layout, size = self.layout, self.size
+        iterations = 0
+        if self.table is not None:
+            nodes = len(self.table) + 1 + np.searchsorted(self.table, keys, 'right' if right else 'left')
+            iterations += self.levels * len(keys)
+        else:
+            nodes = np.ones(len(keys), dtype=np.intp)
+        while True:
+            active = nodes <= size
+            count = int(np.count_nonzero(active))
+            if count == 0: break
+            iterations += count
+            probe = layout[np.minimum(nodes, size)]
+            step = probe <= keys if right else probe < keys
+            nodes = np.where(active, 2 * nodes + step, nodes)
+        # the lowest zero bit of each node is a power of two, shifting past it undoes the trailing right turns
+        nodes >>= np.log2(~nodes & (nodes + 1)).astype(np.intp) + 1
+        return nodes, iterations
+
+    # ============================================= DATA, FILE I/O ==============================================
+
+    def save(self, file):
+        """
+        writes the index to disk so it does not have to be rebuilt at every startup.
+
+        :param file: string - the relative path of the output file, numpy appends .npz if missing
+        :return: None
+        """
+        np.savez(file, layout=self.layout, rank=self.rank, levels=self.levels)
+
+    @classmethod
+    def load(cls, file):
+        """
+        reads an index written by save().
+
+        :param file: string - the relative path of the index file
+        :return: the loaded index
+        :rtype: EytzingerIndex
+        """
+        index = cls()
+        with np.load(file, allow_pickle=False) as data:
+            index.layout = data['layout']
+            index.rank = data['rank']
+            index.levels = int(data['levels'])
+        index.size = len(index.layout) - 1
+        index.table = np.sort(index.layout[1:1 << index.levels]) if index.levels else None
+        return index
+
+
+# =================================================== HELPERS ===================================================
+
+
+def eytzinger(dataset):
+    """
+    re-lays out a sorted array in eytzinger order. node k has children 2k and 2k + 1, position 0 is unused.
+    sorting the nodes by their path, left-aligned and padded with a single set bit, gives the in-order
+    traversal of the tree, so the whole layout is built with one vectorized argsort.
+
+    :param dataset: a sorted array
+    :return: the layout array, and the array mapping each layout position to its index in the sorted array
+        (position 0 maps to len(dataset), the past-the-end index)
+    """
+    size = len(dataset)
+    nodes = np.arange(1, size + 1, dtype=np.int64)
+    height = size.bit_length()
+    depth = np.floor(np.log2(nodes)).astype(np.int64)
+    order = np.argsort((2 * nodes + 1) << (height - depth), kind='stable')
+    layout = np.empty(size + 1, dtype=dataset.dtype)
+    layout[0] = 0
+    layout[order + 1] = dataset
+    rank = np.empty(size + 1, dtype=np.intp)
+    rank[0] = size
+    rank[order + 1] = np.arange(size)
+    return layout, rank
@@ -0,0 +1,208 @@
+from contextlib import contextmanager
+from time import perf_counter_ns
+import numpy as np
+import searches as searches
+import sorts as sorts
+
+
+# the helpers every sort and search reports through. the sorts look these up as module globals on every call,
+# so replacing them for the duration of an instrument() block is enough to observe them, and outside of one
+# the original functions run untouched
+HOOKS = {
+    sorts: ['swap', 'peek', 'push', 'descend', 'heapify', 'heapifyMin', 'buildHeap', 'siftHeap', 'mergeSplit', 'merge',
+            'partition', 'partitionThreeWay', 'choosePivot', 'insertionSort', 'heapsortRange', 'findRuns',
+            'gallopMerge', 'radixPasses'],
+    searches: ['binarySearch', 'binarySearchLeastIndex', 'exponentialSearch', 'boundsBatch', 'interpolationBound'],
+}
+
+
+# ================================================= INSTRUMENT =================================================
+
+
+class Counters:
+    """
+    per-call counters collected while an instrument() block is active. comparisons, reads and writes are only
+    seen on arrays passed through wrap(), everything else is collected from the hooked helpers.
+    """
+
+    def __init__(self, timings=False):
+        """
+        :param timings: whether the time spent in each helper (the phases of a sort) should be recorded
+        """
+        self.timings = timings
+        self.comparisons = 0
+        self.swaps = 0
+        self.reads = 0
+        self.writes = 0
+        self.max_stack = 0
+        self.calls = {}
+        self.depth = {}
+        self.times = {}
+        self.active = {}
+
+    def hook(self, name, function):
+        """
+        wraps a helper so every call is counted, its nesting (recursion) depth is tracked and, with timings on,
+        the inclusive time spent in it is accumulated.
+
+        :param name: the name the helper is reported under
+        :param function: the helper to be wrapped
+        :return: the wrapped helper
+        """
+        def hooked(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if name == 'swap': self.swaps += 1
+            elif name == 'peek': self.max_stack = max(self.max_stack, len(args[0]))
+            # explicit stacks are measured as they grow, the item being pushed included
+            elif name == 'push': self.max_stack = max(self.max_stack, len(args[0]) + 1)
+            # selections report the depth they reached instead of keeping a stack
+            elif name == 'descend': self.max_stack = max(self.max_stack, args[0])
+            depth = self.active.get(name, 0) + 1
+            self.active[name] = depth
+            if depth > self.depth.get(name, 0): self.depth[name] = depth
+            start = perf_counter_ns() if self.timings else 0
+            try:
+                return function(*args, **kwargs)
+            finally:
+                # only the outermost call of a recursive helper is timed, so nested time is not counted twice
+                if self.timings and depth == 1:
+                    self.times[name] = self.times.get(name, 0) + perf_counter_ns() - start
+                self.active[name] = depth - 1
+        hooked.__wrapped__ = function
+        return hooked
+
+    def wrap(self, dataset):
+        """
+        wraps an array so element reads, writes and comparisons made by the sorts and searches are counted.
+        vectorized sorts see the underlying array through __array__ and are not counted element by element.
+
+        :param dataset: the array to be observed
+        :return: the traced array
+        :rtype: TracedArray
+        """
+        return TracedArray(dataset, self)
+
+    def report(self):
+        """
+        :return: a dict of every counter, with per-helper calls, maximum depth and (if enabled) nanoseconds
+        """
+        return {'comparisons': self.comparisons, 'swaps': self.swaps, 'reads': self.reads, 'writes': self.writes,
+                'max_stack': self.max_stack, 'calls': dict(self.calls), 'depth': dict(self.depth),
+                'times_ns': dict(self.times)}
+
+    def __repr__(self):
+        return f'Counters({self.report()})'
+
+
+@contextmanager
+def instrument(timings=False):
+    """
+    context manager that routes the helpers in HOOKS through a fresh set of counters, restoring the original
+    helpers on exit. not thread safe: calls from other threads made during the block are counted too.
+
+    usage:
+        with instrument(timings=True) as counters:
+            sorts.heapsort(counters.wrap(dataset))
+        print(counters.report())
+
+    :param timings: whether per-helper (per-phase) timings should be recorded, default False
+    :return: the Counters collecting the calls made inside the block
+    """
+    counters = Counters(timings)
+    originals = []
+    for module, names in HOOKS.items():
+        for name in names:
+            function = getattr(module, name)
+            originals.append((module, name, function))
+            setattr(module, name, counters.hook(name, function))
+    try:
+        yield counters
+    finally:
+        for module, name, function in originals:
+            setattr(module, name, function)
+
+
+# =================================================== HELPERS ===================================================
+
+
+class TracedArray:
+    """
+    array proxy that counts element reads and writes, and hands out TracedValues so comparisons are counted.
+    slices share the counters (and, for numpy arrays, the memory) of the original.
+    """
+
+    def __init__(self, data, counters):
+        self.data = data
+        self.counters = counters
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice): return TracedArray(self.data[index], self.counters)
+        self.counters.reads += 1
+        return TracedValue(self.data[index], self.counters)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self.counters.writes += len(range(*index.indices(len(self.data))))
+            self.data[index] = [unwrap(v) for v in value] if isinstance(value, (list, TracedArray)) else value
+            return
+        self.counters.writes += 1
+        self.data[index] = unwrap(value)
+
+    def __iter__(self):
+        for i in range(len(self.data)): yield self[i]
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.data, dtype=dtype)
+
+    def tolist(self):
+        return list(self.data)
+
+
+class TracedValue:
+    """
+    element proxy that counts every comparison it takes part in.
+    """
+    __slots__ = ('value', 'counters')
+
+    def __init__(self, value, counters):
+        self.value = value
+        self.counters = counters
+
+    def compare(self, other):
+        self.counters.comparisons += 1
+        return unwrap(other)
+
+    def __lt__(self, other): return self.value < self.compare(other)
+
+    def __le__(self, other): return self.value <= self.compare(other)
+
+    def __gt__(self, other): return self.value > self.compare(other)
+
+    def __ge__(self, other): return self.value >= self.compare(other)
+
+    def __eq__(self, other): return self.value == self.compare(other)
+
+    def __ne__(self, other): return self.value != self.compare(other)
+
+    def __hash__(self): return hash(self.value)
+
+    def __int__(self): return int(self.value)
+
+    def __index__(self): return int(self.value)
+
+    def __float__(self): return float(self.value)
+
+    def __repr__(self): return repr(self.value)
+
+
+def unwrap(value):
+    """
+    :param value: a TracedValue, TracedArray or plain value
+    :return: the underlying value
+    """
+    if isinstance(value, TracedValue): return value.value
+    if isinstance(value, TracedArray): return value.data
+    return value
@@ -0,0 +1,308 @@
+import heapq
+from itertools import chain, islice
+import numpy as np
+import searches as searches
+
+
+# a source at least this many times smaller than every other one makes intersection gallop through the others
+SKEW = 64
+
+
+# ==================================================== MERGE ====================================================
+
+
+def kWayMerge(sources, out=None, block=1 << 16):
+    """
+    merges any number of sorted sources into one sorted stream. see mergeTagged() for the engine.
+
+    :param sources: a list of sorted sources: arrays, memory-mapped arrays (e.g. datafile.readBinary),
+        iterables of sorted arrays (e.g. datafile.readTextChunks) or iterables of values
+    :param out: a preallocated array the result is written into - optional, see fill()
+    :param block: the number of elements read from a source at once and the most merged per round, default 65536
+    :return: a generator of sorted arrays, or the number of elements written if out is given
+    """
+    merged = (values for values, _ in mergeTagged(sources, block))
+    return merged if out is None else fill(merged, out)
+
+
+def mergeTagged(sources, block=1 << 16):
+    """
+    the k-way merge engine. each source is read a block at a time, with the following block prefetched, and
+    two heaps are kept over the loaded blocks: one of the first unmerged value of every source and one of the
+    last value of every block that has more data behind it. the smallest such last value is a bound nothing
+    unread can be below, so in each round every source whose next value is within the bound gives up
+    everything up to it, found with a binary search of its block, and the pieces are combined with one stable
+    sort of the concatenated runs. sources whose head is above the bound are not touched, so a round costs
+    O(log k) per contributing source rather than O(k). a round that would merge more than block elements, e.g.
+    the last one, where everything left is loaded and within the bound, is cut short (see cutRound()), so
+    memory stays bounded by the blocks however many sources there are.
+
+    :param sources: a list of sorted sources, see kWayMerge()
+    :param block: the number of elements read from a source at once and the most merged in one round (unless
+        more sources than that contribute to it, each giving at least one), default 65536
+    :return: a generator of (values, tags) array pairs, tags holding the index of the source of each value.
+        equal values from different sources are in source order within a pair but may be split across pairs
+    """
+    readers = [readBlocks(source, block) for source in sources]
+    buffers = [None] * len(readers)
+    upcoming = [nextBlock(reader) for reader in readers]
+    positions = [0] * len(readers)
+    # the number of blocks loaded from every source, entries of lasts from earlier blocks are stale
+    loads = [0] * len(readers)
+    heads, lasts = [], []
+
+    def advance(i):
+        # makes the prefetched block of source i current and prefetches the one after it
+        data = buffers[i] = upcoming[i]
+        loads[i] += 1
+        if data is None: return
+        positions[i] = 0
+        upcoming[i] = nextBlock(readers[i])
+        heapq.heappush(heads, (data[0], i))
+        if upcoming[i] is not None: heapq.heappush(lasts, (data[-1], i, loads[i]))
+
+    for i in range(len(readers)): advance(i)
+    while heads:
+        while lasts and lasts[0][2] != loads[lasts[0][1]]: heapq.heappop(lasts)
+        # with no more data behind any block, everything loaded can be merged
+        bound = lasts[0][0] if lasts else None
+        pieces = []
+        while heads and (bound is None or heads[0][0] <= bound):
+            _, i = heapq.heappop(heads)
+            data, start = buffers[i], positions[i]
+            end = len(data) if bound is None else start + int(np.searchsorted(data[start:], bound, 'right'))
+            pieces.append((i, start, end))
+        if sum(end - start for _, start, end in pieces) > block: pieces = cutRound(buffers, pieces, block)
+        taken = []
+        for i, start, end in pieces:
+            taken.append((i, buffers[i][start:end]))
+            positions[i] = end
+            if end < len(buffers[i]): heapq.heappush(heads, (buffers[i][end], i))
+            else: advance(i)
+        taken.sort(key=lambda part: part[0])
+        values = np.concatenate([part for _, part in taken])
+        tags = np.concatenate([np.full(len(part), i, dtype=np.intp) for i, part in taken])
+        # the concatenation is a few sorted runs, which the stable sort merges
+        order = np.argsort(values, kind='stable')
+        yield values[order], tags[order]
+
+
+# ================================================= SET OPERATIONS =================================================
+
+
+def union(sources, distinct=False, out=None, block=1 << 16):
+    """
+    sorted union of sorted sources. as multisets a value occurs as often as in the source holding it most often,
+    with distinct=True every value occurs once.
+
+    :param sources: a list of sorted sources, see kWayMerge()
+    :param distinct: whether duplicates are dropped, default False
+    :param out: a preallocated array the result is written into - optional, see fill()
+    :param block: the number of elements read from a source at once and the most merged per round, default 65536
+    :return: a generator of sorted arrays, or the number of elements written if out is given
+    """
+    def keep(counts): return np.ones(len(counts), dtype=np.int64) if distinct else counts.max(axis=1)
+    return setOperation(sources, keep, out, block)
+
+
+def intersection(sources, distinct=False, out=None, block=1 << 16, skew=SKEW):
+    """
+    sorted intersection of sorted sources. as multisets a value occurs as often as in the source holding it
+    least often, with distinct=True every common value occurs once. when one source is an array at least skew
+    times smaller than every other array, its values are looked up in the others with galloping
+    searches.SearchCursor scans instead of merging, O(m log(n / m)) per source rather than O(n + m).
+
+    :param sources: a list of sorted sources, see kWayMerge()
+    :param distinct: whether duplicates are dropped, default False
+    :param out: a preallocated array the result is written into - optional, see fill()
+    :param block: the number of elements read from a source at once and the most merged per round, default 65536
+    :param skew: the size ratio from which the smallest source drives galloping lookups, default 64
+    :return: a generator of sorted arrays, or the number of elements written if out is given
+    """
+    if len(sources) > 1 and all(isinstance(source, np.ndarray) for source in sources):
+        sizes = [len(source) for source in sources]
+        small = int(np.argmin(sizes))
+        if all(size >= skew * sizes[small] for i, size in enumerate(sizes) if i != small):
+            others = [source for i, source in enumerate(sources) if i != small]
+            result = gallopIntersection(sources[small], others, distinct, block)
+            return result if out is None else fill(result, out)
+
+    def keep(counts): return (counts.min(axis=1) > 0).astype(np.int64) if distinct else counts.min(axis=1)
+    return setOperation(sources, keep, out, block)
+
+
+def difference(sources, distinct=False, out=None, block=1 << 16):
+    """
+    sorted difference of the first source and all the others. as multisets every occurrence in the others
+    cancels one occurrence in the first, with distinct=True a value occurs once if it is in the first source
+    and in none of the others.
+
+    :param sources: a list of sorted sources, see kWayMerge(), the first is the one subtracted from
+    :param distinct: whether duplicates are dropped, default False
+    :param out: a preallocated array the result is written into - optional, see fill()
+    :param block: the number of elements read from a source at once and the most merged per round, default 65536
+    :return: a generator of sorted arrays, or the number of elements written if out is given
+    """
+    def keep(counts):
+        removed = counts[:, 1:].sum(axis=1)
+        if distinct: return ((counts[:, 0] > 0) & (removed == 0)).astype(np.int64)
+        return np.maximum(counts[:, 0] - removed, 0)
+    return setOperation(sources, keep, out, block)
+
+
+# =================================================== HELPERS ===================================================
+
+
+def setOperation(sources, keep, out, block):
+    """
+    runs a set operation on the per-source counts of every distinct value (see groupCounts()).
+
+    :param sources: a list of sorted sources
+    :param keep: a function from a (values, sources) count matrix to the number of times each value is output
+    :param out: a preallocated array the result is written into - optional
+    :param block: the number of elements read from a source at once
+    :return: a generator of sorted arrays, or the number of elements written if out is given
+    """
+    result = (np.repeat(values, keep(counts)) for values, counts in groupCounts(mergeTagged(sources, block),
+                                                                            len(sources)))
+    return result if out is None else fill(result, out)
+
+
+def cutRound(buffers, pieces, block):
+    """
+    cuts the pieces of a merge round at a common value so together they hold at most block elements. the cut
+    is the median of the values the pieces hold at an even share of block, which keeps close to block elements
+    when the pieces are alike, and the share is halved while that is still too many. if a share of one is too
+    many (long runs of equal values), every piece is capped at its share instead and the cut is the smallest
+    value at such a cap, so the piece holding it gives exactly its share and the round still advances.
+
+    :param buffers: the loaded block of every source
+    :param pieces: a list of (source, start, end) ranges of the loaded blocks, all within the bound of the round
+    :param block: the most elements the round may hold
+    :return: the cut list of (source, start, end) ranges, some possibly empty
+    """
+    share = max(1, block // len(pieces))
+    while True:
+        marks = sorted(buffers[i][start + min(share, end - start) - 1] for i, start, end in pieces)
+        cut = marks[len(marks) // 2]
+        ends = [start + int(np.searchsorted(buffers[i][start:end], cut, 'right')) for i, start, end in pieces]
+        if sum(end - start for end, (_, start, _) in zip(ends, pieces)) <= block:
+            return [(i, start, end) for end, (i, start, _) in zip(ends, pieces)]
+        if share == 1: break
+        share //= 2
+    share = max(1, block // len(pieces))
+    cut = min(buffers[i][start + min(share, end - start) - 1] for i, start, end in pieces)
+    return [(i, start, start + min(share, int(np.searchsorted(buffers[i][start:end], cut, 'right'))))
+            for i, start, end in pieces]
+
+
+def groupCounts(tagged, k):
+    """
+    reduces a tagged merge to the distinct values and how often each source holds them. a run of equal values
+    can continue into the next block, so the counts of the last value of every block are carried over and
+    only the counts, never the values of the run, are held back.
+
+    :param tagged: a generator of (values, tags) pairs, see mergeTagged()
+    :param k: the number of sources
+    :return: a generator of (distinct values, counts) pairs, counts being a (len(values), k) int64 array
+    """
+    carry = None
+    for values, tags in tagged:
+        if len(values) == 0: continue
+        starts = np.concatenate(([True], values[1:] != values[:-1]))
+        unique = values[starts]
+        group = np.cumsum(starts) - 1
+        counts = np.bincount(group * k + tags, minlength=len(unique) * k).reshape(len(unique), k)
+        if carry is not None:
+            if unique[0] == carry[0]:
+                counts[0] += carry[1]
+            else:
+                unique = np.concatenate((carry[0], unique))
+                counts = np.vstack((carry[1], counts))
+        carry = unique[-1:], counts[-1]
+        if len(unique) > 1: yield unique[:-1], counts[:-1]
+    if carry is not None: yield carry[0], carry[1][None]
+
+
+def gallopIntersection(small, others, distinct, block):
+    """
+    intersection driven by the smallest array: every distinct value of it is counted in each other array with
+    a searches.SearchCursor, whose finger only moves forward, so each lookup gallops from the previous one.
+
+    :param small: the smallest sorted array
+    :param others: the other sorted arrays
+    :param distinct: whether duplicates are dropped
+    :param block: the number of elements of the small array handled at once
+    :return: a generator of sorted arrays
+    """
+    cursors = [searches.SearchCursor(other) for other in others]
+    for values, counts in groupCounts(((data, np.zeros(len(data), dtype=np.intp))
+                                       for data in readBlocks(small, block)), 1):
+        keep = counts[:, 0].copy()
+        for j, value in enumerate(values.tolist()):
+            for cursor in cursors:
+                lower, _ = cursor.lowerBound(value)
+                upper, _ = cursor.upperBound(value)
+                keep[j] = min(keep[j], upper - lower)
+                if keep[j] == 0: break
+        if distinct: keep = np.minimum(keep, 1)
+        yield np.repeat(values, keep)
+
+
+def readBlocks(source, block):
+    """
+    reads a sorted source as a stream of arrays.
+
+    :param source: an array (sliced, so memory-mapped files are read a block at a time), an iterable of
+        arrays (used as they are) or an iterable of values (packed into arrays of at most block elements)
+    :param block: the number of elements per array for arrays and iterables of values
+    :return: a generator of arrays
+    """
+    if isinstance(source, np.ndarray):
+        return iter([source[i:i + block] for i in range(0, len(source), block)])
+    iterator = iter(source)
+    for first in iterator:
+        if isinstance(first, np.ndarray): return chain([first], iterator)
+        dtype = np.asarray(first).dtype
+        # strings and other objects keep their python type, fixed-width numpy strings would be truncated
+        values = chain([first], iterator)
+        return packBlocks(values, dtype if dtype.kind in 'biuf' else object, block)
+    return iter(())
+
+
+def nextBlock(blocks):
+    """
+    :param blocks: an iterator of arrays
+    :return: the next non-empty array, None once the iterator is exhausted
+    """
+    for data in blocks:
+        if len(data): return data
+    return None
+
+
+def packBlocks(values, dtype, block):
+    """
+    :return: a generator of arrays of at most block elements taken from an iterator of values
+    """
+    while True:
+        # fromiter grows the array directly from the iterator, no intermediate list is built
+        data = np.fromiter(islice(values, block), dtype=dtype)
+        if len(data) == 0: return
+        yield data
+
+
+def fill(blocks, out):
+    """
+    writes a stream of arrays into a preallocated array, e.g. one from datafile.createBinary().
+
+    :param blocks: an iterable of arrays
+    :param out: the output array
+    :return: the number of elements written, the rest of out is left untouched
+    :rtype: int
+    """
+    written = 0
+    for data in blocks:
+        if written + len(data) > len(out): raise ValueError('output buffer is too small for the result')
+        out[written:written + len(data)] = data
+        written += len(data)
+    return written
@@ -0,0 +1,254 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from time import perf_counter, time
+import numpy as np
+import sorts as sorts
+
+
+# ==================================================== SORT ====================================================
+
+
+def parallelMergesort(dataset, workers=None, threshold=1 << 16):
+    """
+    multi-core mergesort. the array is copied once into a shared memory block holding two ping-pong buffers,
+    each worker sorts its own segment in place, then adjacent segments are merged level by level. every
+    merge is split across workers with merge-path partitioning, so the last levels still use every core.
+    only buffer names and offsets are sent to the workers, the data itself is never pickled.
+
+    :param dataset: input array, sorted in place
+    :param workers: the number of worker processes - optional, os.cpu_count() if None
+    :param threshold: arrays shorter than this use the serial sorts.mergesort, default 65536
+    :return: sorted array, the runtime of the sort
+    """
+    if not isinstance(dataset, np.ndarray): dataset = np.asarray(dataset)
+    workers = workers or os.cpu_count() or 1
+    size = len(dataset)
+    # only plain numeric data can live in shared memory, an object array would share pointers into this
+    # process's heap rather than the objects themselves
+    if size < threshold or workers < 2 or dataset.dtype.kind not in 'biuf':
+        return sorts.mergesort(dataset)
+    start_time = time()
+    shm = SharedMemory(create=True, size=2 * dataset.nbytes)
+    dtype = dataset.dtype.str
+    try:
+        buffers = sharedBuffers(shm, dtype, size)
+        buffers[0][:] = dataset
+        bounds = [size * i // workers for i in range(workers + 1)]
+        segments = list(zip(bounds[:-1], bounds[1:]))
+        with ProcessPoolExecutor(workers) as pool:
+            list(pool.map(sortSegment, [(shm.name, dtype, size, lo, hi) for lo, hi in segments]))
+            src = 0
+            while len(segments) > 1:
+                tasks = []
+                merged = []
+                for i in range(0, len(segments), 2):
+                    lo, mid = segments[i]
+                    hi = segments[i + 1][1] if i + 1 < len(segments) else mid
+                    # give each merge a share of the workers proportional to its length
+                    parts = max(1, round(workers * (hi - lo) / size))
+                    for p in range(parts):
+                        k0 = (hi - lo) * p // parts
+                        k1 = (hi - lo) * (p + 1) // parts
+                        tasks.append((shm.name, dtype, size, src, lo, mid, hi, k0, k1))
+                    merged.append((lo, hi))
+                list(pool.map(mergeSegment, tasks))
+                segments = merged
+                src ^= 1
+        dataset[:] = buffers[src]
+        # views into the shared block have to be released before it can be closed
+        del buffers
+    finally:
+        shm.close()
+        shm.unlink()
+    end_time = time()
+    return dataset, end_time - start_time
+
+
+def parallelRadixMSD(dataset, workers=None, threshold=1 << 16, digit=8, small=64):
+    """
+    parallel most-significant-digit radix sort. the keys are copied once into shared memory and partitioned
+    on their top digit, then each bucket is finished independently by a worker: LSD radix (sorts.radixPasses)
+    for most buckets, insertion sort for small ones. buckets larger than an even share of the data are
+    partitioned again on their next digit before being handed out, so skewed keys still spread over every
+    worker. the first digit starts at the highest bit in which the smallest and largest key of a range differ,
+    so narrow or offset key ranges don't spend passes on bits they all share, and buckets holding a single
+    value are already sorted and left out. signed integers and floats go through the same order-preserving
+    transform as the other radix sorts.
+
+    :param dataset: input array of integers or floats, sorted in place
+    :param workers: the number of worker processes - optional, os.cpu_count() if None
+    :param threshold: arrays shorter than this use the serial sorts.radixVectorized, default 65536
+    :param digit: the width in bits of each MSD digit, default 8
+    :param small: buckets shorter than this are insertion sorted, default 64
+    :return: sorted array, the runtime of the sort, and a list of per-worker dicts (pid, buckets, elements, seconds)
+    """
+    if not isinstance(dataset, np.ndarray): dataset = np.asarray(dataset)
+    workers = workers or os.cpu_count() or 1
+    size = len(dataset)
+    if size < threshold or workers < 2:
+        dataset, runtime = sorts.radixVectorized(dataset)
+        return dataset, runtime, []
+    start_time = time()
+    transform = not (dataset.dtype.kind == 'u' or (dataset.dtype.kind == 'i' and dataset.min() >= 0))
+    keys = sorts.radixKey(dataset) if transform else dataset
+    dtype = keys.dtype.str
+    shm = SharedMemory(create=True, size=keys.nbytes)
+    try:
+        shared, = sharedBuffers(shm, dtype, size, 1)
+        shared[:] = keys
+        target = max(small, -(-size // workers))
+        # (start, end, number of low bits still unsorted) for every range that is not finished yet, the bits above
+        # the highest one in which its smallest and largest keys differ are the same for the whole range
+        ranges = [(0, size, (int(shared.min()) ^ int(shared.max())).bit_length())]
+        tasks = []
+        first = True
+        while ranges:
+            lo, hi, bits = ranges.pop()
+            if hi - lo < 2 or bits == 0: continue
+            if first or hi - lo > target:
+                first = False
+                shift = max(0, bits - digit)
+                bounds = partitionDigit(shared[lo:hi], shift, bits - shift)
+                starts = np.array([a for a, b in zip(bounds[:-1], bounds[1:]) if b > a])
+                # the smallest and largest key of every bucket, a bucket of one value gets no bits and is skipped
+                low = np.minimum.reduceat(shared[lo:hi], starts).tolist()
+                high = np.maximum.reduceat(shared[lo:hi], starts).tolist()
+                ends = starts[1:].tolist() + [hi - lo]
+                ranges.extend((lo + a, lo + b, (smallest ^ largest).bit_length())
+                              for a, b, smallest, largest in zip(starts.tolist(), ends, low, high))
+            else:
+                tasks.append((shm.name, dtype, size, lo, hi, small))
+        report = {}
+        with ProcessPoolExecutor(workers) as pool:
+            for pid, seconds, elements in pool.map(sortBucket, tasks, chunksize=max(1, len(tasks) // (4 * workers))):
+                stats = report.setdefault(pid, {'pid': pid, 'buckets': 0, 'elements': 0, 'seconds': 0.0})
+                stats['buckets'] += 1
+                stats['elements'] += elements
+                stats['seconds'] += seconds
+        dataset[:] = sorts.radixKeyInverse(shared, dataset.dtype) if transform else shared
+        # views into the shared block have to be released before it can be closed
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+    end_time = time()
+    return dataset, end_time - start_time, list(report.values())
+
+
+# =================================================== HELPERS ===================================================
+
+
+def sharedBuffers(shm, dtype, size, count=2):
+    """
+    creates consecutive array views over a shared memory block, by default the two ping-pong buffers.
+
+    :param shm: the SharedMemory block, at least count times the size of the data
+    :param dtype: the dtype string of the data
+    :param size: the number of elements per buffer
+    :param count: the number of buffers, default 2
+    :return: a tuple of the array views
+    """
+    nbytes = np.dtype(dtype).itemsize * size
+    return tuple(np.ndarray(size, dtype=dtype, buffer=shm.buf, offset=i * nbytes) for i in range(count))
+
+
+def sortSegment(task):
+    """
+    worker function, attaches to the shared block and stably sorts one segment of the first buffer in place.
+
+    :param task: tuple of (block name, dtype string, buffer length, segment start, segment end)
+    :return: None
+    """
+    name, dtype, size, lo, hi = task
+    shm = SharedMemory(name=name)
+    try:
+        buffers = sharedBuffers(shm, dtype, size)
+        buffers[0][lo:hi].sort(kind='stable')
+        del buffers
+    finally:
+        shm.close()
+
+
+def mergeSegment(task):
+    """
+    worker function, merges one merge-path partition of two adjacent sorted segments from the source
+    buffer into the same output positions of the other buffer.
+
+    :param task: tuple of (block name, dtype string, buffer length, source buffer, start of left segment,
+        start of right segment, end of right segment, first output rank, last output rank)
+    :return: None
+    """
+    name, dtype, size, src, lo, mid, hi, k0, k1 = task
+    shm = SharedMemory(name=name)
+    try:
+        buffers = sharedBuffers(shm, dtype, size)
+        left, right = buffers[src][lo:mid], buffers[src][mid:hi]
+        i0, i1 = coRank(k0, left, right), coRank(k1, left, right)
+        sorts.mergeSorted(left[i0:i1], right[k0 - i0:k1 - i1], buffers[src ^ 1][lo + k0:lo + k1])
+        del buffers, left, right
+    finally:
+        shm.close()
+
+
+def coRank(k, left, right):
+    """
+    merge-path partitioning: finds how many of the first k elements of the stable merge of two sorted
+    arrays come from the left array. complexity is O(log n).
+
+    :param k: the output rank to partition at
+    :param left: a sorted array
+    :param right: a sorted array
+    :return: the number of elements taken from the left array
+    :rtype: int
+    """
+    lo, hi = max(0, k - len(right)), min(k, len(left))
+    while lo < hi:
+        i = (lo + hi) >> 1
+        # ties go to the left array, so if left[i] is not greater than right[k - i - 1] it is in the prefix
+        if left[i] <= right[k - i - 1]:
+            lo = i + 1
+        else:
+            hi = i
+    return lo
+
+
+def partitionDigit(keys, shift, width):
+    """
+    one MSD pass: stably partitions an array in place on the digit of the given width at the given shift. when
+    the histogram shows every key in one bucket the array is left as it is.
+
+    :param keys: the array of unsigned or non-negative keys to be partitioned
+    :param shift: the position of the lowest bit of the digit
+    :param width: the width of the digit in bits
+    :return: the list of bucket boundaries, from 0 to len(keys)
+    """
+    digits = ((keys >> shift) & ((1 << width) - 1)).astype(np.uint16)
+    counts = np.bincount(digits, minlength=1 << width)
+    if counts[digits[0]] < len(keys): keys[:] = keys[np.argsort(digits, kind='stable')]
+    return [0] + np.cumsum(counts).tolist()
+
+
+def sortBucket(task):
+    """
+    worker function, attaches to the shared block and sorts one bucket of it in place.
+
+    :param task: tuple of (block name, dtype string, buffer length, bucket start, bucket end, insertion sort cutoff)
+    :return: the worker's pid, the seconds spent sorting and the number of elements sorted
+    """
+    name, dtype, size, lo, hi, small = task
+    start = perf_counter()
+    shm = SharedMemory(name=name)
+    try:
+        shared, = sharedBuffers(shm, dtype, size, 1)
+        bucket = shared[lo:hi]
+        if hi - lo < small:
+            sorts.insertionSort(bucket, 0, hi - lo - 1)
+        else:
+            result, _ = sorts.radixPasses(bucket)
+            if result is not bucket: bucket[:] = result
+            del result
+        del shared, bucket
+    finally:
+        shm.close()
+    return os.getpid(), perf_counter() - start, hi - lo
@@ -0,0 +1,43 @@
+import adaptive as adaptive
+import searches as searches
+import sorts as sorts
+
+
+# the names the benchmark and the command-line tool accept. this module only imports the algorithm modules, so
+# looking a name up never pays for the benchmark harness (subprocess, tracemalloc, platform).
+
+# every sort in sorts, mapped to the function and its optional second parameter
+SORTS = {
+    'mergesort': (sorts.mergesort, None),
+    'naturalMergesort': (sorts.naturalMergesort, None),
+    'radixLSB': (sorts.radixLSB, None),
+    'radixLSD': (sorts.radixLSD, 10),
+    'radixLSD2P': (sorts.radixLSD2P, None),
+    'radixVectorized': (sorts.radixVectorized, None),
+    'radixArgsort': (sorts.radixArgsort, None),
+    'mergeArgsort': (sorts.mergeArgsort, None),
+    'heapsort': (sorts.heapsort, None),
+    'heapArgsort': (sorts.heapArgsort, None),
+    'quicksort': (sorts.quicksort, None),
+    'introsort': (sorts.introsort, None),
+    'sort': (adaptive.sort, None),
+}
+
+# every search in searches, mapped to the function and whether it takes the whole batch of keys at once
+SEARCHES = {
+    'binarySearch': (searches.binarySearch, False),
+    'binarySearchLeastIndex': (searches.binarySearchLeastIndex, False),
+    'binarySearchRange': (searches.binarySearchRange, False),
+    'exponentialSearch': (searches.exponentialSearch, False),
+    'exponentialSearchRange': (searches.exponentialSearchRange, False),
+    'interpolationSearch': (searches.interpolationSearch, False),
+    'interpolationSearchLeastIndex': (searches.interpolationSearchLeastIndex, False),
+    'interpolationSearchRange': (searches.interpolationSearchRange, False),
+    'interpolationSequentialSearch': (searches.interpolationSequentialSearch, False),
+    'binarySearchBatch': (searches.binarySearchBatch, True),
+    'binarySearchLeastIndexBatch': (searches.binarySearchLeastIndexBatch, True),
+    'binarySearchRangeBatch': (searches.binarySearchRangeBatch, True),
+    'interpolationSearchBatch': (searches.interpolationSearchBatch, True),
+    'interpolationSearchLeastIndexBatch': (searches.interpolationSearchLeastIndexBatch, True),
+    'interpolationSearchRangeBatch': (searches.interpolationSearchRangeBatch, True),
+}
@@ -1,3 +1,4 @@
+import math
 import numpy as np
 
 
@@ -15,26 +16,21 @@ def binarySearch(dataset, key, t=None):
     :param key: the value to be searched for
     :return: the largest index at which the key is found/None if not found and the number of iterations the search took
     """
-    index = None
     # initializes values to track the range of values to be searched
     if t is None: left, right = 0, (len(dataset) - 1)
     else: left, right = t
-    # initialize a midpoint value
-    mid = (right + left) >> 1
+    # the search narrows [low, high) down to the first index holding a value greater than the key
+    low, high = left, right + 1
     iterations = 0
-    # iterate over the range while the range still consists of at least 2 values
-    while right - left > 0:
+    while low < high:
         iterations += 1
+        mid = (low + high) >> 1
         # if the key is to the left of the midpoint, shrink the right side of the range
-        if key < dataset[mid]:
-            right = left + ((right - left) >> 1)
+        if key < dataset[mid]: high = mid
         # otherwise, shrink the left side of the range
-        else:
-            left = left + ((right - left) >> 1) + 1
-        # recalculate the midpoint
-        mid = (right + left) >> 1
-        if dataset[mid] == key:
-            index = mid
+        else: low = mid + 1
+    # the greatest index at which the key could occur is the one just before that
+    index = low - 1 if low > left and dataset[low - 1] == key else None
     return index, iterations
 
 
@@ -49,26 +45,20 @@ def binarySearchLeastIndex(dataset, key, t=None):
     :param key: the value to be searched for
     :return: the largest index at which the key is found/None if not found and the number of iterations the search took
     """
-    index = None
     # initializes values to track the range of values to be searched
     if t is None: left, right = 0, (len(dataset) - 1)
     else: left, right = t
-    # initialize a midpoint value
-    mid = (right + left) >> 1
+    # the search narrows [low, high) down to the first index holding a value not less than the key
+    low, high = left, right + 1
     iterations = 0
-    # iterate over the range while the range still consists of at least 2 values
-    while right - left > 0:
+    while low < high:
         iterations += 1
+        mid = (low + high) >> 1
         # if the key is to the right of the midpoint, shrink the left side of the range
-        if key > dataset[mid]:
-            left = left + ((right - left) >> 1) + 1
-        # otherwise, shrink the left side of the range
-        else:
-            right = left + ((right - left) >> 1)
-        # recalculate the midpoint
-        mid = (right + left) >> 1
-        if dataset[mid] == key:
-            index = mid
+        if key > dataset[mid]: low = mid + 1
+        # otherwise, shrink the right side of the range
+        else: high = mid
+    index = low if low <= right and dataset[low] == key else None
     return index, iterations
 
 
@@ -81,39 +71,345 @@ def exponentialSearch(dataset, key, lower=False):
     :param lower: whether the binary search should find the least or greatest index
     :return: the largest index at which the key is found/None if not found and the number of iterations the search took
     """
-    index = None
-    iterations = 0
     max_index = len(dataset) - 1
     # handle the case in which the key is not in the range
-    if key > dataset[max_index]:
+    if max_index < 0 or key > dataset[max_index]:
         return None, 1
-    left = 0
-    right = 1
-    power = -1
-    # this finds a potential range to binary search in, sets to None if a valid range is not found
-    while left < max_index:
-        left = int(2 ** power)
-        right = 2 ** (power + 1)
-        if right > max_index: right = max_index
-        # if the key is between the searched ranges, it exits the loop
-        if dataset[right] >= key >= dataset[left]:
-            break
-        # if the right side of the searched range is the max and the key is not in between, breaks, sets returns to None
-        elif dataset[right] == max_index:
-            left = right = None
-            break
-        power += 1
+    iterations = 0
+    bound = 1
+    # double the bound until it passes the key: the greatest index is searched for past values equal to the key,
+    # the least index stops before them. the previous bound is then known to be on the near side of the key
+    while bound <= max_index and (dataset[bound] < key or (not lower and dataset[bound] == key)):
+        iterations += 1
+        bound <<= 1
     # do binary search to find least or greatest index, depending on optional arg
-    if left is not None:
-        if lower: index, temp = binarySearchLeastIndex(dataset, key, (left, right))
-        else: index, temp = binarySearch(dataset, key, (left, right))
+    t = (bound >> 1, min(bound, max_index))
+    if lower: index, temp = binarySearchLeastIndex(dataset, key, t)
+    else: index, temp = binarySearch(dataset, key, t)
+    return index, iterations + temp
+
+
+def interpolationSearch(dataset, key, t=None):
+    """
+    searches a sorted list by probing where the key should be if the values were evenly spread between the
+    ends of the search range. O(log log n) on uniformly distributed data; when probes stop halving the range
+    the search falls back to bisection, so the worst case stays O(log n). this version of the search always
+    finds the greatest index at which the key occurs.
+
+    :param t: tuple, represents an optional range
+    :param dataset: a sorted array
+    :param key: the value to be searched for
+    :return: the largest index at which the key is found/None if not found and the number of iterations the search took
+    """
+    left = 0 if t is None else t[0]
+    index, iterations = interpolationBound(dataset, key, True, t)
+    return (index - 1 if index > left and dataset[index - 1] == key else None), iterations
+
+
+def interpolationSearchLeastIndex(dataset, key, t=None):
+    """
+    interpolation search with adaptive fallback to bisection, see interpolationSearch().
+    this version of the search always finds the least index at which the key occurs.
+
+    :param t: tuple, represents an optional range
+    :param dataset: a sorted array
+    :param key: the value to be searched for
+    :return: the least index at which the key is found/None if not found and the number of iterations the search took
+    """
+    right = len(dataset) - 1 if t is None else t[1]
+    index, iterations = interpolationBound(dataset, key, False, t)
+    return (index if index <= right and dataset[index] == key else None), iterations
+
+
+def interpolationSequentialSearch(dataset, key, lower=False):
+    """
+    interpolation-sequential search: a single interpolated probe, then a linear walk towards the key.
+    if the walk takes more than log2(n) steps the data is not as even as assumed and the rest of the
+    walk is replaced by an interpolation search of the remaining range.
+
+    :param dataset: a sorted array
+    :param key: the value to be searched for
+    :param lower: whether the least or greatest index should be found
+    :return: the largest (or least) index at which the key is found/None if not found and the number of iterations
+        the search took
+    """
+    size = len(dataset)
+    if size == 0: return None, 0
+    upper = not lower
+
+    def before(value): return value <= key if upper else value < key
+
+    limit = size.bit_length()
+    index = interpolate(dataset, key, 0, size)
+    iterations = 1
+    steps = 0
+    if before(dataset[index]):
+        index += 1
+        while index < size and before(dataset[index]):
+            iterations += 1
+            index += 1
+            steps += 1
+            if steps == limit:
+                index, temp = interpolationBound(dataset, key, upper, (index, size - 1))
+                iterations += temp
+                break
+    else:
+        while index > 0 and not before(dataset[index - 1]):
+            iterations += 1
+            index -= 1
+            steps += 1
+            if steps == limit:
+                index, temp = interpolationBound(dataset, key, upper, (0, index - 1))
+                iterations += temp
+                break
+    if upper: return (index - 1 if index > 0 and dataset[index - 1] == key else None), iterations
+    return (index if index < size and dataset[index] == key else None), iterations
+
+
+# ===================================================== BATCH =====================================================
+
+
+# sentinel stored in batch results for keys that are not in the dataset, the batch form of None
+NOT_FOUND = -1
+
+
+def binarySearchBatch(dataset, keys):
+    """
+    batch form of binarySearch, answers every key against the same sorted array in one vectorized call.
+
+    :param dataset: a sorted array
+    :param keys: an array of values to be searched for
+    :return: array of the largest index at which each key is found/NOT_FOUND and the total number of iterations
+    """
+    lower, upper, iterations = boundsBatch(dataset, keys)
+    return np.where(upper > lower, upper - 1, NOT_FOUND), iterations
+
+
+def binarySearchLeastIndexBatch(dataset, keys):
+    """
+    batch form of binarySearchLeastIndex, answers every key against the same sorted array in one vectorized call.
+
+    :param dataset: a sorted array
+    :param keys: an array of values to be searched for
+    :return: array of the least index at which each key is found/NOT_FOUND and the total number of iterations
+    """
+    lower, upper, iterations = boundsBatch(dataset, keys)
+    return np.where(upper > lower, lower, NOT_FOUND), iterations
+
+
+def binarySearchRangeBatch(dataset, keys):
+    """
+    batch form of binarySearchRange, finds the range of indices at which each key occurs.
+
+    :param dataset: a sorted array
+    :param keys: an array of values to be searched for
+    :return: a (len(keys), 2) array of (least, greatest) index pairs, both NOT_FOUND for missing keys,
+        and the total number of iterations
+    """
+    lower, upper, iterations = boundsBatch(dataset, keys)
+    found = upper > lower
+    return np.stack((np.where(found, lower, NOT_FOUND), np.where(found, upper - 1, NOT_FOUND)), axis=1), iterations
+
+
+def interpolationSearchBatch(dataset, keys):
+    """
+    batch form of interpolationSearch, every key is interpolated in the same vectorized steps.
+
+    :param dataset: a sorted array
+    :param keys: an array of values to be searched for
+    :return: array of the largest index at which each key is found/NOT_FOUND and the total number of iterations
+    """
+    lower, upper, iterations = interpolationBoundsBatch(dataset, keys)
+    return np.where(upper > lower, upper - 1, NOT_FOUND), iterations
+
+
+def interpolationSearchLeastIndexBatch(dataset, keys):
+    """
+    batch form of interpolationSearchLeastIndex.
+
+    :param dataset: a sorted array
+    :param keys: an array of values to be searched for
+    :return: array of the least index at which each key is found/NOT_FOUND and the total number of iterations
+    """
+    lower, upper, iterations = interpolationBoundsBatch(dataset, keys)
+    return np.where(upper > lower, lower, NOT_FOUND), iterations
+
+
+def interpolationSearchRangeBatch(dataset, keys):
+    """
+    batch form of interpolationSearchRange.
+
+    :param dataset: a sorted array
+    :param keys: an array of values to be searched for
+    :return: a (len(keys), 2) array of (least, greatest) index pairs, both NOT_FOUND for missing keys,
+        and the total number of iterations
+    """
+    lower, upper, iterations = interpolationBoundsBatch(dataset, keys)
+    found = upper > lower
+    return np.stack((np.where(found, lower, NOT_FOUND), np.where(found, upper - 1, NOT_FOUND)), axis=1), iterations
+
+
+# ==================================================== CURSOR ====================================================
+
+
+class SearchCursor:
+    """
+    finger search over a sorted array. the cursor remembers where the last search ended and gallops outward
+    from there (1, 2, 4, ... positions) in either direction before binary searching the bracket it found,
+    so a search d positions away from the previous one takes O(log d) iterations instead of O(log n).
+    suited to nearly monotone lookup sequences such as merge-join style scans.
+    """
+
+    def __init__(self, dataset, finger=0):
+        """
+        :param dataset: a sorted array
+        :param finger: the index the first search starts from, default 0
+        """
+        self.dataset = dataset
+        self.finger = finger
+
+    def lowerBound(self, key):
+        """
+        finds the first index whose value is not less than the key, len(dataset) if there is none.
+
+        :param key: the value to be searched for
+        :return: the lower bound and the number of iterations the search took
+        """
+        self.finger, iterations = self.gallop(key, False)
+        return self.finger, iterations
+
+    def upperBound(self, key):
+        """
+        finds the first index whose value is greater than the key, len(dataset) if there is none.
+
+        :param key: the value to be searched for
+        :return: the upper bound and the number of iterations the search took
+        """
+        self.finger, iterations = self.gallop(key, True)
+        return self.finger, iterations
+
+    def seek(self, key):
+        """
+        moves the cursor to the key, the cursor form of binarySearchLeastIndex.
+
+        :param key: the value to be searched for
+        :return: the least index at which the key is found/None if not found and the number of iterations the
+            search took
+        """
+        index, iterations = self.lowerBound(key)
+        return (index if index < len(self.dataset) and self.dataset[index] == key else None), iterations
+
+    def range(self, key):
+        """
+        finds the range of indices at which the key occurs, the cursor form of binarySearchRange.
+        the upper bound is galloped to from the lower bound, so long runs of equal keys stay cheap.
+
+        :param key: the value to be searched for
+        :return: the (least, greatest) index tuple/None if not found and the number of iterations the search took
+        """
+        left, iterations = self.lowerBound(key)
+        right, temp = self.gallop(key, True)
         iterations += temp
-    return index, iterations
+        return ((left, right - 1) if right > left else None), iterations
+
+    # ================================================= HELPERS =================================================
+
+    def gallop(self, key, upper):
+        """
+        the bulk of the cursor searches. first answers which side of the finger the bound is on, then doubles
+        the step until the bound is bracketed and finishes with a binary search of the bracket.
+
+        :param key: the value to be searched for
+        :param upper: whether to find the upper bound instead of the lower bound
+        :return: the bound and the number of iterations the search took
+        """
+        dataset = self.dataset
+        size = len(dataset)
+        finger = min(max(self.finger, 0), size)
+
+        # the bound is the first index at which this is False
+        def before(value): return value <= key if upper else value < key
+
+        iterations = 1
+        if finger < size and before(dataset[finger]):
+            # the bound is to the right of the finger
+            left, step = finger + 1, 1
+            right = finger + step
+            while right < size and before(dataset[right]):
+                iterations += 1
+                left = right + 1
+                step <<= 1
+                right = finger + step
+            right = min(right, size)
+        else:
+            # the bound is at the finger or to its left
+            right, step = finger, 1
+            left = finger - step
+            while left >= 0 and not before(dataset[left]):
+                iterations += 1
+                right = left
+                step <<= 1
+                left = finger - step
+            left = max(left + 1, 0)
+        while left < right:
+            iterations += 1
+            mid = (left + right) >> 1
+            if before(dataset[mid]): left = mid + 1
+            else: right = mid
+        return left, iterations
 
 
 # =================================================== HELPERS ===================================================
 
 
+def boundsBatch(dataset, keys):
+    """
+    computes the lower and upper bound of every key in a sorted array with a vectorized binary search per key,
+    O(k log n). a sorted batch only searches each key between the bounds of its neighbours, see sortedBounds().
+    numpy does not report the steps it took, so the iterations are the comparisons a binary search makes,
+    ceil(log2(m + 1)) steps per key and bound for a search over m elements.
+
+    :param dataset: a sorted array
+    :param keys: an array of values to be searched for
+    :return: the array of lower bounds, the array of upper bounds and the number of iterations taken
+    """
+    dataset, keys = np.asarray(dataset), np.asarray(keys)
+    if len(keys) > 1 and np.all(keys[:-1] <= keys[1:]):
+        lower, iterations = sortedBounds(dataset, keys, 'left')
+        upper, temp = sortedBounds(dataset, keys, 'right')
+        return lower, upper, iterations + temp
+    depth = max(1, len(dataset).bit_length())
+    lower = np.searchsorted(dataset, keys, 'left')
+    upper = np.searchsorted(dataset, keys, 'right')
+    return lower, upper, 2 * len(keys) * depth
+
+
+def sortedBounds(dataset, keys, side):
+    """
+    the bounds of a sorted batch of keys. the batch is split into blocks of about sqrt(k) keys and only the
+    first key of every block is searched in the whole array, the rest of a block is searched between the bound
+    of its first key and that of the next block's first key. keys spread over the array leave O(n / sqrt(k))
+    elements per block, so a search costs O(log(n / sqrt(k))) instead of O(log n).
+
+    :param dataset: a sorted array
+    :param keys: a sorted array of values to be searched for
+    :param side: 'left' for lower bounds, 'right' for upper bounds
+    :return: the array of bounds and the number of iterations taken
+    """
+    count = len(keys)
+    step = max(1, math.isqrt(count))
+    fences = np.searchsorted(dataset, keys[::step], side)
+    iterations = len(fences) * max(1, len(dataset).bit_length())
+    ends = fences[1:].tolist() + [len(dataset)]
+    bounds = np.empty(count, dtype=np.intp)
+    bounds[::step] = fences
+    for start, lo, hi in zip(range(0, count, step), fences.tolist(), ends):
+        block = keys[start + 1:start + step]
+        bounds[start + 1:start + step] = lo + np.searchsorted(dataset[lo:hi], block, side)
+        iterations += len(block) * max(1, (hi - lo).bit_length())
+    return bounds, iterations
+
+
 def binarySearchRange(dataset, key):
     """
     performs a binary search to find the range of indices at which a value occurs in a set
@@ -146,6 +442,148 @@ def exponentialSearchRange(dataset, key):
     return t, iterations
 
 
+def interpolationBound(dataset, key, upper, t=None):
+    """
+    the bulk of the interpolation searches. narrows [left, right + 1) down to the lower bound (first value not
+    less than the key) or upper bound (first value greater than the key). every interpolated probe is followed by
+    a guard probe, and a step that fails to halve the range is a miss. after two misses the rest of the search
+    is plain bisection, which keeps the worst case at O(log n).
+
+    :param dataset: a sorted array
+    :param key: the value to be searched for
+    :param upper: whether to find the upper bound instead of the lower bound
+    :param t: tuple, represents an optional range
+    :return: the bound and the number of iterations the search took
+    """
+    if t is None: left, right = 0, len(dataset) - 1
+    else: left, right = t
+    right += 1
+    iterations = 0
+    misses = 0
+
+    def before(value): return value <= key if upper else value < key
+
+    while left < right:
+        iterations += 1
+        size = right - left
+        if misses >= 2:
+            mid = (left + right) >> 1
+            if before(dataset[mid]): left = mid + 1
+            else: right = mid
+            continue
+        mid = interpolate(dataset, key, left, right)
+        # the error of a good estimate is about sqrt(size), so a second probe that far past the first one on
+        # the key's side usually brackets the key in a range of that size
+        guard = max(1, math.isqrt(size))
+        if before(dataset[mid]):
+            left = mid + 1
+            mid = min(mid + guard, right - 1)
+        else:
+            right = mid
+            mid = max(mid - guard, left)
+        if left < right:
+            iterations += 1
+            if before(dataset[mid]): left = mid + 1
+            else: right = mid
+        if right - left > size >> 1: misses += 1
+    return left, iterations
+
+
+def interpolate(dataset, key, left, right):
+    """
+    estimates the position of a key in [left, right) from the values at both ends of the range.
+
+    :param dataset: a sorted array
+    :param key: the value to be searched for
+    :param left: the start of the range
+    :param right: the end of the range, exclusive
+    :return: the probe index, clamped to the range, or the midpoint where no estimate can be made (equal or
+        infinite ends, an infinite key)
+    :rtype: int
+    """
+    low, high = float(dataset[left]), float(dataset[right - 1])
+    if not (low < high and math.isfinite(low) and math.isfinite(high)): return (left + right) >> 1
+    # the float estimate may be far outside the range, clamp it before converting
+    estimate = left + (float(key) - low) * (right - 1 - left) / (high - low)
+    if not math.isfinite(estimate): return (left + right) >> 1
+    return int(min(max(estimate, left), right - 1))
+
+
+def interpolationBoundsBatch(dataset, keys):
+    """
+    vectorized interpolationBound for both bounds of every key.
+
+    :param dataset: a sorted array
+    :param keys: an array of values to be searched for
+    :return: the array of lower bounds, the array of upper bounds and the number of iterations taken
+    """
+    dataset, keys = np.asarray(dataset), np.asarray(keys)
+    lower, iterations = interpolationBoundBatch(dataset, keys, False)
+    upper, temp = interpolationBoundBatch(dataset, keys, True)
+    return lower, upper, iterations + temp
+
+
+def interpolationBoundBatch(dataset, keys, upper):
+    """
+    vectorized interpolationBound, every still unresolved key takes one probe per step.
+
+    :param dataset: a sorted array
+    :param keys: an array of values to be searched for
+    :param upper: whether to find upper bounds instead of lower bounds
+    :return: the array of bounds and the number of iterations taken
+    """
+    count = len(keys)
+    left = np.zeros(count, dtype=np.intp)
+    right = np.full(count, len(dataset), dtype=np.intp)
+    misses = np.zeros(count, dtype=np.intp)
+    iterations = 0
+    while True:
+        active = np.flatnonzero(left < right)
+        if len(active) == 0: break
+        iterations += len(active)
+        lo, hi, key = left[active], right[active], keys[active]
+        size = hi - lo
+        low, high = dataset[lo].astype(np.float64), dataset[hi - 1].astype(np.float64)
+        # infinite ends or keys give infinite or nan estimates, those keys bisect like in interpolate()
+        with np.errstate(all='ignore'):
+            span = high - low
+            estimate = lo + (key.astype(np.float64) - low) * (hi - 1 - lo) / np.where(span > 0, span, 1)
+        bisect = (misses[active] >= 2) | ~((span > 0) & np.isfinite(span) & np.isfinite(estimate))
+        estimate = np.clip(np.where(bisect, lo, estimate), lo, hi - 1).astype(np.intp)
+        mid = np.where(bisect, (lo + hi) >> 1, estimate)
+        probe = dataset[mid]
+        step = probe <= key if upper else probe < key
+        lo, hi = np.where(step, mid + 1, lo), np.where(step, hi, mid)
+        # guard probe sqrt(size) past the estimate on the key's side, see interpolationBound()
+        guard = np.maximum(1, np.sqrt(size).astype(np.intp))
+        second = ~bisect & (lo < hi)
+        iterations += int(np.count_nonzero(second))
+        mid = np.where(step, np.minimum(mid + guard, hi - 1), np.maximum(mid - guard, lo))
+        mid = np.where(second, mid, lo)
+        probe = dataset[np.minimum(mid, len(dataset) - 1)]
+        step = probe <= key if upper else probe < key
+        lo, hi = np.where(second & step, mid + 1, lo), np.where(second & ~step, mid, hi)
+        misses[active] += ~bisect & (hi - lo > size >> 1)
+        left[active], right[active] = lo, hi
+    return left, iterations
+
+
+def interpolationSearchRange(dataset, key):
+    """
+    performs an interpolation search to find the range of indices at which a value occurs in a set
+    :param dataset: a sorted array
+    :param key: the value to be searched for
+    :return: either a single index, or a range of indices
+    """
+    right, iterations = interpolationBound(dataset, key, True)
+    left, temp = interpolationBound(dataset, key, False)
+    iterations += temp
+    t = None
+    if right > left:
+        t = left, right - 1
+    return t, iterations
+
+
 # =========================================== DATA, FILE I/O, TESTING ===========================================
 
 
@@ -182,3 +620,39 @@ def processOutput(output):
         return f'index {output}'
     if type(output) == tuple:
         return f'indices {output[0]} to {output[1]}' if output[1] > output[0] else f'index {output[0]}'
+
+
+def checkSearches(trials=1000, size=64, seed=0):
+    """
+    checks every single-key search against np.searchsorted on small random arrays full of duplicates, the inputs
+    where off-by-one bound handling shows up. keys are drawn from just outside the range of values too.
+
+    :param trials: the number of random arrays, default 1000
+    :param size: the largest array length, default 64
+    :param seed: seed of the generator, default 0
+    :return: a list of (search, dataset, key, result, expected) tuples for every wrong answer, empty if all agree
+    """
+    greatest = {'binarySearch': binarySearch, 'exponentialSearch': exponentialSearch,
+                'interpolationSearch': interpolationSearch,
+                'interpolationSequentialSearch': interpolationSequentialSearch}
+    least = {'binarySearchLeastIndex': binarySearchLeastIndex,
+             'exponentialSearch(lower)': lambda data, key: exponentialSearch(data, key, True),
+             'interpolationSearchLeastIndex': interpolationSearchLeastIndex,
+             'interpolationSequentialSearch(lower)': lambda data, key: interpolationSequentialSearch(data, key, True)}
+    ranges = {'binarySearchRange': binarySearchRange, 'exponentialSearchRange': exponentialSearchRange,
+              'interpolationSearchRange': interpolationSearchRange}
+    rng = np.random.default_rng(seed)
+    failures = []
+    for _ in range(trials):
+        length = int(rng.integers(1, size + 1))
+        dataset = np.sort(rng.integers(0, max(2, length // 2), length))
+        key = int(rng.integers(-1, dataset[-1] + 2))
+        lower, upper = int(np.searchsorted(dataset, key, 'left')), int(np.searchsorted(dataset, key, 'right'))
+        found = lower < upper
+        expected = {**{name: upper - 1 if found else None for name in greatest},
+                    **{name: lower if found else None for name in least},
+                    **{name: (lower, upper - 1) if found else None for name in ranges}}
+        for name, search in {**greatest, **least, **ranges}.items():
+            result = search(dataset, key)[0]
+            if result != expected[name]: failures.append((name, dataset, key, result, expected[name]))
+    return failures
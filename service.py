@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import json
+import os
+from collections import deque
+from time import perf_counter
+import numpy as np
+import datafile as datafile
+import searches as searches
+
+
+# line protocol: the client sends one integer key per line and gets back "least greatest" per line, in order,
+# with both set to searches.NOT_FOUND if the key is not in the dataset. the line STATS returns the metrics as json.
+STATS = b'STATS'
+
+
+# =================================================== BATCHER ===================================================
+
+
+class Batcher:
+    """
+    coalesces lookups that arrive within a short window into one vectorized range search. a batch is sent
+    once it holds max_batch keys or max_delay seconds have passed since its first key arrived, so max_delay
+    bounds the latency added to a lone request and max_batch bounds the work per search.
+    """
+
+    def __init__(self, dataset, max_batch=1024, max_delay=0.001, window=10.0):
+        """
+        :param dataset: a sorted array
+        :param max_batch: the largest number of keys searched at once, default 1024
+        :param max_delay: the longest a key waits for the batch to fill in seconds, default 1ms
+        :param window: the span of recent batches the reported throughput is measured over in seconds, default 10
+        """
+        self.dataset = dataset
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.window = window
+        self.queue = asyncio.Queue()
+        self.requests = 0
+        self.batches = 0
+        self.iterations = 0
+        self.max_depth = 0
+        self.failures = 0
+        # (finish time, size) of the batches within the throughput window, oldest first
+        self.recent = deque()
+        self.started = perf_counter()
+        self.task = None
+
+    def start(self):
+        """
+        starts the batching loop on the running event loop.
+
+        :return: None
+        """
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def submit(self, key):
+        """
+        queues a key for the next batch.
+
+        :param key: the value to be searched for
+        :return: a future resolving to the (least, greatest) index pair
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((key, future))
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return future
+
+    async def run(self):
+        """
+        the batching loop: waits for a first key, collects more until the batch is full or the window closes,
+        then answers the whole batch with one call to searches.binarySearchRangeBatch. a search that raises fails
+        the futures of its batch only, the loop carries on with the next one.
+
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                # drain whatever is already queued before waiting on the clock
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0: break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                ranges, iterations = searches.binarySearchRangeBatch(self.dataset,
+                                                                     np.array([key for key, _ in batch]))
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done(): future.set_exception(error)
+                self.failures += 1
+                continue
+            for (_, future), pair in zip(batch, ranges.tolist()):
+                if not future.done(): future.set_result(pair)
+            self.requests += len(batch)
+            self.batches += 1
+            self.iterations += iterations
+            now = perf_counter()
+            self.recent.append((now, len(batch)))
+            while self.recent[0][0] < now - self.window: self.recent.popleft()
+
+    def stats(self):
+        """
+        :return: dict of requests, batches, failed batches, mean batch size, throughput in requests/s over the
+            last window seconds (or since the start if that is shorter), queue depth and iterations
+        """
+        now = perf_counter()
+        span = min(self.window, now - self.started)
+        recent = sum(size for finished, size in self.recent if finished >= now - self.window)
+        return {'requests': self.requests, 'batches': self.batches, 'failed_batches': self.failures,
+                'mean_batch': self.requests / self.batches if self.batches else 0.0,
+                'throughput': recent / span if span else 0.0, 'throughput_window': self.window,
+                'queue_depth': self.queue.qsize(), 'max_queue_depth': self.max_depth, 'iterations': self.iterations}
+
+
+# ==================================================== SERVER ====================================================
+
+
+async def serve(dataset, host='127.0.0.1', port=8765, path=None, max_batch=1024, max_delay=0.001):
+    """
+    serves range lookups over a sorted dataset loaded once, on a tcp port or a unix socket.
+
+    :param dataset: a sorted array
+    :param host: the address to listen on, default 127.0.0.1
+    :param port: the tcp port to listen on, default 8765
+    :param path: a unix socket path to listen on instead of tcp - optional
+    :param max_batch: the largest number of keys searched at once, default 1024
+    :param max_delay: the longest a key waits for the batch to fill in seconds, default 1ms
+    :return: the running asyncio server and its batcher
+    """
+    batcher = Batcher(dataset, max_batch, max_delay)
+    batcher.start()
+
+    async def handle(reader, writer):
+        # responses are written by a separate task in request order, so a client can pipeline requests
+        # and they still share batches
+        pending = asyncio.Queue()
+
+        async def respond():
+            while True:
+                future = await pending.get()
+                if future is None: break
+                if isinstance(future, bytes):
+                    writer.write(future)
+                else:
+                    try:
+                        least, greatest = await future
+                        writer.write(f'{least} {greatest}\n'.encode())
+                    except Exception as error:
+                        writer.write(f'ERROR {error}\n'.encode())
+                if pending.empty(): await writer.drain()
+
+        responder = asyncio.create_task(respond())
+        try:
+            async for line in reader:
+                line = line.strip()
+                if not line: continue
+                if line == STATS:
+                    pending.put_nowait((json.dumps(batcher.stats()) + '\n').encode())
+                    continue
+                try:
+                    pending.put_nowait(batcher.submit(int(line)))
+                except ValueError:
+                    pending.put_nowait(b'ERROR bad key\n')
+        finally:
+            pending.put_nowait(None)
+            await responder
+            writer.close()
+
+    if path is not None: server = await asyncio.start_unix_server(handle, path)
+    else: server = await asyncio.start_server(handle, host, port)
+    return server, batcher
+
+
+def loadDataset(file):
+    """
+    loads a dataset for serving: binary dataset files are memory mapped, text files are read in chunks.
+    the data is sorted if the file does not say it already is.
+
+    :param file: string - the relative path of the dataset file
+    :return: the sorted array
+    """
+    try:
+        data, header = datafile.readBinary(file)
+        if header['sorted']: return data
+        data = np.array(data)
+    except ValueError:
+        chunks = list(datafile.readTextChunks(file))
+        data = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+    data.sort(kind='stable')
+    return data
+
+
+# ==================================================== CLIENT ====================================================
+
+
+async def loadTest(keys, host='127.0.0.1', port=8765, path=None, connections=8, window=32):
+    """
+    load generator: spreads the keys over several connections, each keeping up to window requests in flight.
+
+    :param keys: the keys to be looked up
+    :param host: the address of the server, default 127.0.0.1
+    :param port: the tcp port of the server, default 8765
+    :param path: a unix socket path to connect to instead of tcp - optional
+    :param connections: the number of concurrent connections, default 8
+    :param window: the number of pipelined requests per connection, default 32
+    :return: dict of requests, elapsed seconds, throughput in requests/s and latency percentiles in ms,
+        plus the server's own stats
+    """
+    latencies = []
+
+    async def client(part):
+        if path is not None: reader, writer = await asyncio.open_unix_connection(path)
+        else: reader, writer = await asyncio.open_connection(host, port)
+        sent = []
+        for start in range(0, len(part), window):
+            block = part[start:start + window]
+            sent.clear()
+            for key in block:
+                sent.append(perf_counter())
+                writer.write(f'{key}\n'.encode())
+            await writer.drain()
+            for began in sent:
+                await reader.readline()
+                latencies.append(perf_counter() - began)
+        writer.close()
+
+    keys = list(keys)
+    start = perf_counter()
+    await asyncio.gather(*[client(keys[i::connections]) for i in range(connections)])
+    elapsed = perf_counter() - start
+    if path is not None: reader, writer = await asyncio.open_unix_connection(path)
+    else: reader, writer = await asyncio.open_connection(host, port)
+    writer.write(STATS + b'\n')
+    await writer.drain()
+    server = json.loads(await reader.readline())
+    writer.close()
+    latency = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {'requests': len(keys), 'elapsed': elapsed, 'throughput': len(keys) / elapsed if elapsed else 0.0,
+            'p50_ms': float(np.percentile(latency, 50)), 'p95_ms': float(np.percentile(latency, 95)),
+            'p99_ms': float(np.percentile(latency, 99)), 'server': server}
+
+
+# =========================================== DATA, FILE I/O, TESTING ===========================================
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='micro-batching lookup service over a sorted dataset')
+    commands = parser.add_subparsers(dest='command', required=True)
+    server = commands.add_parser('serve', help='serve lookups over a dataset file')
+    server.add_argument('file', help='binary or text dataset file')
+    server.add_argument('--max-batch', type=int, default=1024)
+    server.add_argument('--max-delay', type=float, default=0.001, help='seconds')
+    load = commands.add_parser('load', help='generate load against a running server')
+    load.add_argument('--requests', type=int, default=100000)
+    load.add_argument('--connections', type=int, default=8)
+    load.add_argument('--window', type=int, default=32)
+    load.add_argument('--power', type=int, default=31, help='keys are drawn from 0 to 2^power')
+    load.add_argument('--seed', type=int, default=0)
+    for command in (server, load):
+        command.add_argument('--host', default='127.0.0.1')
+        command.add_argument('--port', type=int, default=8765)
+        command.add_argument('--unix', help='unix socket path, overrides host and port')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        async def run():
+            server, _ = await serve(loadDataset(args.file), args.host, args.port, args.unix, args.max_batch,
+                                    args.max_delay)
+            print(f'Serving {args.file} on {args.unix or f"{args.host}:{args.port}"}')
+            async with server: await server.serve_forever()
+        try:
+            asyncio.run(run())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if args.unix is not None and os.path.exists(args.unix): os.remove(args.unix)
+    else:
+        keys = np.random.default_rng(args.seed).integers(0, 2 ** args.power, args.requests).tolist()
+        report = asyncio.run(loadTest(keys, args.host, args.port, args.unix, args.connections, args.window))
+        print(json.dumps(report, indent=1))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 from time import time
 import math as math
 import numpy as np
-import random as rand
+import datafile as datafile
 rng = np.random.default_rng()
 
 
@@ -27,20 +27,22 @@ def radixLSB(dataset):
     """
     radix sort starting at the least significant bit, only utilizing 2 buckets.
 
-    :param dataset: input array
+    :param dataset: input array of integers, negative values are shifted by the minimum (see radixOffset())
     :return: sorted array, the runtime of the sort
     """
-    temp = dataset.tolist()
+    temp = radixList(dataset)
     start_time = time()
+    temp, low = radixOffset(temp)
     # iterate over the length of the longest value in the set
-    for i in range(0, math.ceil(math.log2(max(temp)))):
+    for i in range(0, int(max(temp, default=0)).bit_length()):
         buckets = [[], []]
         # assign data to buckets based on value of bit at the current position
         for data in temp: buckets[data >> i & 1].append(data)
         # concatenate buckets in order and assign to the data set
         temp = buckets[0] + buckets[1]
+    if low: temp = [data + low for data in temp]
     end_time = time()
-    dataset = np.array(temp)
+    dataset = np.array(temp, dtype=dataset.dtype)
     return dataset, end_time - start_time
 
 
@@ -48,22 +50,24 @@ def radixLSD(dataset, base: int):
     """
     least-significant radix sort but using an integer base and standard arithmetic to calculate bucket count.
 
-    :param dataset: input array
+    :param dataset: input array of integers, negative values are shifted by the minimum (see radixOffset())
     :param base: int, indicating what base is used to create buckets and sort
     :return: sorted array, the runtime of the sort
     """
-    temp = dataset.tolist()
+    temp = radixList(dataset)
     start_time = time()
+    temp, low = radixOffset(temp)
     buckets = {}
-    for i in range(0, math.ceil(math.log(max(temp), base))):
+    for i in range(0, radixDigits(max(temp, default=0), base)):
         # create buckets using arbitrary base
         for j in range(base): buckets[j] = []
         # formula used to find value of digit: floor(num) * digit mod base
         for data in temp: buckets[data // base ** i % base].append(data)
         temp.clear()
         for j in range(base): temp += buckets[j]
+    if low: temp = [data + low for data in temp]
     end_time = time()
-    dataset = np.array(temp)
+    dataset = np.array(temp, dtype=dataset.dtype)
     return dataset, end_time - start_time
 
 
@@ -72,26 +76,122 @@ def radixLSD2P(dataset):
     least-significant radix sort, but predetermines the number of buckets to use
     best base is roughly 2^ceil(log2(max_value) / 2)
 
-    :param dataset: input array
+    :param dataset: input array of integers, negative values are shifted by the minimum (see radixOffset())
     :return: sorted array, the runtime of the sort
     """
-    temp = dataset.tolist()
+    temp = radixList(dataset)
     start_time = time()
+    temp, low = radixOffset(temp)
     # determine the best base to use
-    power = math.ceil(math.log2(max(temp)) / 2)
+    bits = int(max(temp, default=0)).bit_length()
+    power = max(1, math.ceil(bits / 2))
     buckets = {}
     # pre-initializing values decreases runtime
     base = 2 ** power
     mask = base - 1
     # originally used i*power in the bucket assignment but having the power be the increment
     # guarantees no arithmetic during bucket calculation and thus less runtime
-    for i in range(0, math.ceil(math.log(max(temp), base)) * power, power):
+    for i in range(0, bits, power):
         for j in range(base): buckets[j] = []
         for data in temp: buckets[data >> i & mask].append(data)
         temp.clear()
         for j in buckets: temp += buckets[j]
+    if low: temp = [data + low for data in temp]
+    end_time = time()
+    dataset = np.array(temp, dtype=dataset.dtype)
+    return dataset, end_time - start_time
+
+
+def radixVectorized(dataset):
+    """
+    least-significant radix sort that never leaves the ndarray. each digit pass is a stable argsort of the
+    extracted digits followed by a take into a single preallocated ping-pong buffer, so no python lists or
+    boxed ints are created; a histogram of the digits is only used to skip passes (see radixPasses). the digit
+    width is chosen the same way as radixLSD2P.
+    signed integers and floats are sorted through an order-preserving bit transform (see radixKey).
+
+    :param dataset: input array of integers or floats, sorted in place
+    :return: sorted array, the runtime of the sort
+    """
+    start_time = time()
+    if not isinstance(dataset, np.ndarray): dataset = np.asarray(dataset)
+    kind = dataset.dtype.kind
+    if kind == 'u' or (kind == 'i' and (len(dataset) == 0 or dataset.min() >= 0)):
+        result, _ = radixPasses(dataset)
+        # an odd number of passes leaves the result in the ping-pong buffer, copy it home
+        if result is not dataset: dataset[:] = result
+    else:
+        result, _ = radixPasses(radixKey(dataset).copy())
+        dataset[:] = radixKeyInverse(result, dataset.dtype)
+    end_time = time()
+    return dataset, end_time - start_time
+
+
+def radixArgsort(dataset, key=None):
+    """
+    argsort variant of radixVectorized. the input is left untouched and the permutation that
+    would sort it is returned instead; equal keys keep their original relative order. multi-column
+    keys are sorted least significant column first, each column refining the order of the last.
+
+    :param dataset: input array, may be a structured array
+    :param key: what to sort by - optional, see sortKeys()
+    :return: index array such that dataset[index] is sorted, the runtime of the sort
+    """
+    start_time = time()
+    columns = sortKeys(dataset, key)
+    perm = np.arange(len(columns[0]), dtype=np.intp)
+    for column in reversed(columns):
+        keys = radixKey(column, False)[perm]
+        _, perm = radixPasses(keys, perm)
+    end_time = time()
+    return perm, end_time - start_time
+
+
+def mergeArgsort(dataset, key=None):
+    """
+    argsort variant of naturalMergesort. the records themselves are never moved, only (key, index) tuples
+    are sorted, so large structured arrays can be ordered by one or more fields cheaply. stable.
+
+    :param dataset: input array, may be a structured array
+    :param key: what to sort by - optional, see sortKeys()
+    :return: index array such that dataset[index] is sorted, the runtime of the sort
+    """
+    start_time = time()
+    records = keyRecords(dataset, key)
+    naturalMergesort(records)
+    perm = np.fromiter((record[-1] for record in records), dtype=np.intp, count=len(records))
+    end_time = time()
+    return perm, end_time - start_time
+
+
+def naturalMergesort(dataset):
+    """
+    iterative bottom-up mergesort in the style of timsort. natural ascending and strictly descending runs are
+    detected first (descending ones are reversed, short ones are extended with insertion sort), then adjacent
+    runs are merged pairwise, ping-ponging between the input and a single auxiliary buffer allocated once.
+    merges gallop when one side keeps winning, so sorted and nearly sorted input finish in near-linear time.
+    stable, like mergesort.
+
+    :param dataset: input array
+    :return: sorted array, the runtime of the sort
+    """
+    start_time = time()
+    size = len(dataset)
+    bounds = findRuns(dataset, minRun(size)) + [size]
+    src = dataset
+    dst = np.empty_like(dataset) if isinstance(dataset, np.ndarray) else list(dataset)
+    while len(bounds) > 2:
+        merged = [0]
+        for p in range(0, len(bounds) - 1, 2):
+            if p + 2 < len(bounds):
+                gallopMerge(src, dst, bounds[p], bounds[p + 1], bounds[p + 2])
+            else:
+                dst[bounds[p]:bounds[p + 1]] = src[bounds[p]:bounds[p + 1]]
+            merged.append(bounds[min(p + 2, len(bounds) - 1)])
+        bounds = merged
+        src, dst = dst, src
+    if src is not dataset: dataset[:] = src
     end_time = time()
-    dataset = np.array(temp)
     return dataset, end_time - start_time
 
 
@@ -107,19 +207,29 @@ def heapsort(dataset):
     """
     start_time = time()
     max_len = len(dataset)
-    # heapify the set from below, O(n log n) worst case
-    for i in range((max_len >> 1) - 1, -1, -1):
-        heapify(dataset, i, max_len)
-    # sift down, heapify can be repurposed for this
-    for i in range(max_len - 1, 0, -1):
-        # swap largest value with first value outside of sorting range
-        swap(dataset, 0, i)
-        # heapify again so that the largest value is at the top
-        heapify(dataset, 0, i)
+    buildHeap(dataset, max_len)
+    siftHeap(dataset, max_len)
     end_time = time()
     return dataset, end_time - start_time
 
 
+def heapArgsort(dataset, key=None):
+    """
+    argsort variant of heapsort, sorting (key, index) tuples instead of the records. the index breaks ties,
+    so unlike heapsort the resulting order is stable.
+
+    :param dataset: input array, may be a structured array
+    :param key: what to sort by - optional, see sortKeys()
+    :return: index array such that dataset[index] is sorted, the runtime of the sort
+    """
+    start_time = time()
+    records = keyRecords(dataset, key)
+    heapsort(records)
+    perm = np.fromiter((record[-1] for record in records), dtype=np.intp, count=len(records))
+    end_time = time()
+    return perm, end_time - start_time
+
+
 def quicksort(dataset):
     """
     iteratively partitions values in a array about the rightmost value, moving greater elements
@@ -131,23 +241,143 @@ def quicksort(dataset):
     """
     start_time = time()
     left, right = 0, len(dataset) - 1
-    # initialize a stack to keep track of left/right pairs
-    stack = [(left, right)]
+    # initialize a stack to keep track of left/right pairs, arrays of fewer than two elements are already sorted
+    stack = [(left, right)] if right > left else []
     while len(stack) > 0:
         # get the current values from the current top of the stack
-        index, pivot = left, right = peek(stack)
-        # iterate over the range at the top of the stack
-        for i in range(left, pivot):
-            # compare values with pivot - increment least index if less than value at pivot
-            if dataset[i] < dataset[pivot]:
-                swap(dataset, i, index)
-                index += 1
-        # swapping the value at the pivot effectively moves greater values to the right of the pivot
-        swap(dataset, index, pivot)
+        left, right = peek(stack)
+        index = partition(dataset, left, right)
         stack.pop()
         # if there are valid ranges to the left or right of the current range, add them to the stack
-        if index - 1 > left: stack.append([left, index - 1])
-        if index + 1 < right: stack.append([index + 1, right])
+        if index - 1 > left: push(stack, [left, index - 1])
+        if index + 1 < right: push(stack, [index + 1, right])
+    end_time = time()
+    return dataset, end_time - start_time
+
+
+def introsort(dataset, cutoff=16):
+    """
+    quicksort with bounded worst case. pivots are picked with median-of-three (ninther on large ranges),
+    ranges are partitioned three ways so runs of equal keys are finished in a single pass, small ranges
+    are left to insertion sort and ranges that recurse deeper than 2 * log2(n) are handed to heapsort.
+    the smaller side of each partition is processed first, so the stack never holds more than O(log n) ranges.
+
+    :param dataset: the full array of data
+    :param cutoff: ranges shorter than this are sorted by insertion sort, default 16
+    :return: sorted array, the runtime of the sort
+    """
+    start_time = time()
+    max_depth = 2 * max(1, len(dataset)).bit_length()
+    stack = [(0, len(dataset) - 1, 0)]
+    while len(stack) > 0:
+        left, right, depth = stack.pop()
+        if right - left < cutoff:
+            insertionSort(dataset, left, right)
+            continue
+        if depth > max_depth:
+            heapsortRange(dataset, left, right)
+            continue
+        pivot = dataset[choosePivot(dataset, left, right)]
+        lt, gt = partitionThreeWay(dataset, left, right, pivot)
+        # push the larger side first so the smaller one is popped and finished before it
+        lower, upper = (left, lt - 1, depth + 1), (gt + 1, right, depth + 1)
+        if lt - left < right - gt: lower, upper = upper, lower
+        push(stack, lower)
+        push(stack, upper)
+    end_time = time()
+    return dataset, end_time - start_time
+
+
+# ==================================================== PARTIAL ====================================================
+
+
+def topK(stream, k, largest=False):
+    """
+    streaming top-k. keeps a bounded heap of the k best items seen so far, so memory is O(k) and time is
+    O(n log k), and the input can be any iterable or generator. the smallest items are kept in a max-heap
+    (heapify) whose root is the first to be evicted, the largest in a min-heap (heapifyMin).
+
+    :param stream: any iterable of comparable items
+    :param k: the number of items to keep
+    :param largest: whether to keep the largest items instead of the smallest, default False
+    :return: array of the top k items in order (ascending for smallest, descending for largest), the runtime
+    """
+    start_time = time()
+    sift = heapifyMin if largest else heapify
+    heap = []
+    if k > 0:
+        for item in stream:
+            if len(heap) < k:
+                heap.append(item)
+                # build the heap once it is full, O(k)
+                if len(heap) == k:
+                    for i in range((k >> 1) - 1, -1, -1): sift(heap, i, k)
+            # replace the root if the new item beats the worst item kept so far
+            elif (item > heap[0]) if largest else (item < heap[0]):
+                heap[0] = item
+                sift(heap, 0, k)
+    size = len(heap)
+    # a stream shorter than k never filled the heap
+    if size < k:
+        for i in range((size >> 1) - 1, -1, -1): sift(heap, i, size)
+    # sifting down a max-heap leaves it ascending, a min-heap descending
+    for i in range(size - 1, 0, -1):
+        swap(heap, 0, i)
+        sift(heap, 0, i)
+    end_time = time()
+    return np.array(heap), end_time - start_time
+
+
+def partialSort(dataset, k):
+    """
+    in-memory partial sort. the first k positions end up holding the k smallest values in sorted order,
+    the order of the rest is unspecified. heap select: a max-heap of the first k values is built, every
+    later value smaller than the root replaces it, then the heap is sifted down into order.
+
+    :param dataset: the full array of data
+    :param k: the number of leading values to sort
+    :return: partially sorted array, the runtime of the sort
+    """
+    start_time = time()
+    k = max(0, min(k, len(dataset)))
+    if k > 0:
+        buildHeap(dataset, k)
+        for i in range(k, len(dataset)):
+            if dataset[i] < dataset[0]:
+                swap(dataset, 0, i)
+                heapify(dataset, 0, k)
+        siftHeap(dataset, k)
+    end_time = time()
+    return dataset, end_time - start_time
+
+
+def nthElement(dataset, n, cutoff=16):
+    """
+    selection (quickselect). rearranges the array so the value at index n is the one that would be there
+    if the array were sorted, with no greater values before it and no lesser values after it. uses the same
+    pivot choice and three-way partition as introsort, but only follows the side holding n, O(n) on average.
+
+    :param dataset: the full array of data
+    :param n: the index to be selected
+    :param cutoff: ranges shorter than this are finished by insertion sort, default 16
+    :return: rearranged array (the selected value is dataset[n]), the runtime of the selection
+    """
+    if not 0 <= n < len(dataset): raise IndexError(f'index {n} out of range for array of length {len(dataset)}')
+    start_time = time()
+    left, right = 0, len(dataset) - 1
+    # the number of nested ranges entered, what a recursive quickselect would hold on its call stack,
+    # O(log n) on average
+    depth = 1
+    while True:
+        if right - left < cutoff:
+            insertionSort(dataset, left, right)
+            break
+        lt, gt = partitionThreeWay(dataset, left, right, dataset[choosePivot(dataset, left, right)])
+        if n < lt: right = lt - 1
+        elif n > gt: left = gt + 1
+        else: break
+        depth += 1
+        descend(depth)
     end_time = time()
     return dataset, end_time - start_time
 
@@ -171,29 +401,378 @@ def mergeSplit(dataset: np.array, left, right):
         mid = left + (right - left) // 2
         mergeSplit(dataset, left, mid)
         mergeSplit(dataset, mid + 1, right)
-        l_track = left
-        r_track = mid + 1
-        # temporary stack to track sorted elements
-        temp = []
-        while l_track < mid + 1 and r_track < right + 1:
-            # get the smallest from each side of the array until one of the sides is completely sorted
-            # this goes to the top of the stack
-            if dataset[l_track] < dataset[r_track]:
-                temp.append(dataset[l_track])
-                l_track += 1
-            else:
-                temp.append(dataset[r_track])
-                r_track += 1
-        # append the rest of the remaining side of the array to the stack
-        while l_track < mid + 1:
+        merge(dataset, left, mid, right)
+
+
+def merge(dataset, left, mid, right):
+    """
+    merges the adjacent sorted ranges [left, mid] and [mid + 1, right] of an array in place.
+
+    :param dataset: the input array
+    :param left: the first index of the left range
+    :param mid: the last index of the left range
+    :param right: the last index of the right range
+    :return: None
+    """
+    l_track = left
+    r_track = mid + 1
+    # temporary stack to track sorted elements
+    temp = []
+    while l_track < mid + 1 and r_track < right + 1:
+        # get the smallest from each side of the array until one of the sides is completely sorted
+        # this goes to the top of the stack
+        if dataset[l_track] < dataset[r_track]:
             temp.append(dataset[l_track])
             l_track += 1
-        while r_track < right + 1:
+        else:
             temp.append(dataset[r_track])
             r_track += 1
-        # pop elements sequentially from the stack, smallest to largest
-        for i in range(left, right + 1):
-            dataset[i] = temp.pop(0)
+    # append the rest of the remaining side of the array to the stack
+    while l_track < mid + 1:
+        temp.append(dataset[l_track])
+        l_track += 1
+    while r_track < right + 1:
+        temp.append(dataset[r_track])
+        r_track += 1
+    # pop elements sequentially from the stack, smallest to largest
+    for i in range(left, right + 1):
+        dataset[i] = temp.pop(0)
+
+
+def radixPower(max_value, cap=16):
+    """
+    picks the digit width (in bits) for a radix sort the same way radixLSD2P does,
+    roughly ceil(log2(max_value) / 2), capped so the digits fit in a uint16.
+
+    :param max_value: the largest key in the set
+    :param cap: the largest digit width allowed, default 16
+    :return: the number of bits per digit, at least 1
+    :rtype: int
+    """
+    bits = int(max_value).bit_length()
+    return max(1, min(cap, math.ceil(bits / 2)))
+
+
+def radixList(dataset):
+    """
+    :param dataset: the input of a list-based radix sort
+    :return: the values as a list of python ints
+    :raises ValueError: for anything but integer or bool arrays, their digits are not defined
+    """
+    dataset = np.asarray(dataset)
+    if dataset.dtype.kind not in 'biu':
+        raise ValueError(f'list-based radix sorts only take integers, not {dataset.dtype}, use radixVectorized')
+    return dataset.tolist()
+
+
+def radixOffset(temp):
+    """
+    shifts a list of ints so the smallest is 0 when there are negative values. shifting by the minimum keeps the
+    keys as narrow as the range of the data, where a sign-bit transform (see radixKey()) would always use the
+    full width of the type, e.g. 2^32 buckets for radixLSD2P on int64.
+
+    :param temp: list of ints
+    :return: the shifted list and the shift to add back, 0 if nothing was shifted
+    """
+    low = min(temp, default=0)
+    if low >= 0: return temp, 0
+    return [data - low for data in temp], low
+
+
+def radixDigits(value, base):
+    """
+    counts the digits of a non-negative integer in an arbitrary base, 0 for 0.
+
+    :param value: the integer
+    :param base: the base
+    :return: the number of digits
+    :rtype: int
+    """
+    digits = 0
+    while value > 0:
+        value //= base
+        digits += 1
+    return digits
+
+
+def sortKeys(dataset, key=None):
+    """
+    the key-extraction layer of the argsorts, turns a key specification into a list of key columns,
+    most significant first.
+
+    :param dataset: the input array, may be a structured array
+    :param key: None for the values themselves (every field, in order, for structured arrays), a field name,
+        a list of field names for a lexicographic key, or a function taking the whole array and returning a
+        key array or a tuple of key arrays
+    :return: a list of key arrays
+    """
+    dataset = np.asarray(dataset)
+    if key is None:
+        columns = [dataset[name] for name in dataset.dtype.names] if dataset.dtype.names else [dataset]
+    elif callable(key):
+        columns = key(dataset)
+        if not isinstance(columns, tuple): columns = [columns]
+    elif isinstance(key, (list, tuple)):
+        columns = [dataset[name] for name in key]
+    else:
+        columns = [dataset[key]]
+    return [np.asarray(column) for column in columns]
+
+
+def keyRecords(dataset, key=None):
+    """
+    builds the (key columns..., index) tuples sorted by the comparison argsorts. tuples compare column by
+    column, so multi-column keys sort lexicographically and the trailing index breaks ties.
+
+    :param dataset: the input array, may be a structured array
+    :param key: what to sort by, see sortKeys()
+    :return: a list of tuples
+    """
+    columns = sortKeys(dataset, key)
+    return list(zip(*[column.tolist() for column in columns], range(len(columns[0]))))
+
+
+def radixKey(column, signed_zero=True):
+    """
+    order-preserving bit transform from any integer, float or bool array to unsigned integers, so the radix
+    sorts can handle negative numbers and floats. signed integers get their sign bit flipped; non-negative
+    floats get their sign bit set and negative floats have every bit inverted, which orders them by value
+    (nan sorts past the infinity of its sign). the transform is a bijection, so radixKeyInverse() gives back
+    the exact input bits; -0.0 keeps its sign bit and sorts just before 0.0.
+
+    :param column: the key array
+    :param signed_zero: whether -0.0 keeps its sign bit, default True. argsorts pass False so -0.0 and 0.0,
+        which compare equal, keep their original relative order - the keys can't be inverted then
+    :return: an unsigned integer array of the same width that sorts in the same order
+    """
+    column = np.asarray(column)
+    kind = column.dtype.kind
+    if kind == 'b': return column.view(np.uint8)
+    if kind not in 'uif': raise TypeError(f'radix sorts do not support dtype {column.dtype}')
+    if not column.dtype.isnative: column = column.astype(column.dtype.newbyteorder('='))
+    if kind == 'u': return column
+    bits = column.view(f'u{column.dtype.itemsize}')
+    sign = bits.dtype.type(1 << (8 * column.dtype.itemsize - 1))
+    if kind == 'i': return bits ^ sign
+    # adding zero turns -0.0 into 0.0, so the two compare equal like they do as floats
+    if not signed_zero: bits = (column + column.dtype.type(0)).view(bits.dtype)
+    return np.where(bits & sign, ~bits, bits | sign)
+
+
+def radixKeyInverse(keys, dtype):
+    """
+    undoes radixKey.
+
+    :param keys: an unsigned integer array produced by radixKey
+    :param dtype: the dtype of the original array
+    :return: the keys transformed back to the original dtype
+    """
+    dtype = np.dtype(dtype)
+    kind = dtype.kind
+    if kind == 'b': return keys.view(np.bool_)
+    if kind == 'u': return keys.astype(dtype)
+    sign = keys.dtype.type(1 << (8 * dtype.itemsize - 1))
+    if kind == 'i': return (keys ^ sign).view(dtype.newbyteorder('='))
+    return np.where(keys & sign, keys ^ sign, ~keys).view(dtype.newbyteorder('='))
+
+
+def radixPasses(keys: np.ndarray, perm=None):
+    """
+    the bulk of the vectorized radix sorts. runs one pass per digit: a stable argsort of the digit array, then a
+    take moving the keys (and the permutation, if given) between the input and one preallocated buffer of the
+    same size. passes where every key shares the same digit are detected from a histogram and skipped.
+
+    :param keys: array of non-negative integer keys, used as one of the two ping-pong buffers
+    :param perm: optional index array that is carried along with the keys
+    :return: the buffer holding the sorted keys, the buffer holding the permutation (or None)
+    """
+    size = len(keys)
+    if size < 2: return keys, perm
+    max_value = int(keys.max())
+    if max_value == 0: return keys, perm
+    power = radixPower(max_value)
+    base = 1 << power
+    mask = base - 1
+    # one buffer of each kind is allocated up front and reused for every pass
+    buffer = np.empty_like(keys)
+    perm_buffer = None if perm is None else np.empty_like(perm)
+    shifted = np.empty_like(keys)
+    digits = np.empty(size, dtype=np.uint16 if power > 8 else np.uint8)
+    for shift in range(0, max_value.bit_length(), power):
+        np.right_shift(keys, shift, out=shifted)
+        np.bitwise_and(shifted, mask, out=shifted)
+        np.copyto(digits, shifted, casting='unsafe')
+        # histogram of the current digit, a single bucket holding everything means the pass is a no-op
+        counts = np.bincount(digits, minlength=base)
+        if counts[digits[0]] == size: continue
+        # numpy sorts uint8/uint16 arrays with kind='stable' by a radix sort in C, so this is the counting pass
+        # without a python-level scatter
+        order = np.argsort(digits, kind='stable')
+        np.take(keys, order, out=buffer)
+        keys, buffer = buffer, keys
+        if perm is not None:
+            np.take(perm, order, out=perm_buffer)
+            perm, perm_buffer = perm_buffer, perm
+    return keys, perm
+
+
+# consecutive wins by one side of a merge before it switches to galloping, the same threshold timsort starts with
+MIN_GALLOP = 7
+
+
+def minRun(size):
+    """
+    computes the minimum run length the same way timsort does: the top 6 bits of the size, plus one if any of
+    the remaining bits are set, so the number of runs is a power of two or slightly less.
+
+    :param size: the length of the array
+    :return: the minimum run length
+    :rtype: int
+    """
+    extra = 0
+    while size >= 64:
+        extra |= size & 1
+        size >>= 1
+    return size + extra
+
+
+def findRuns(dataset, min_run):
+    """
+    splits an array into sorted runs in place. ascending and strictly descending runs are found by scanning
+    (strictness keeps the reversal stable), and runs shorter than min_run are extended by insertion sort.
+
+    :param dataset: the input array
+    :param min_run: the minimum length of a run
+    :return: a list of the start index of each run
+    """
+    size = len(dataset)
+    runs = []
+    i = 0
+    while i < size:
+        j = i + 1
+        if j < size:
+            if dataset[j] < dataset[i]:
+                while j + 1 < size and dataset[j + 1] < dataset[j]: j += 1
+                dataset[i:j + 1] = dataset[i:j + 1][::-1]
+            else:
+                while j + 1 < size and dataset[j + 1] >= dataset[j]: j += 1
+            j += 1
+        end = min(max(j, i + min_run), size)
+        if end > j: insertionSort(dataset, i, end - 1)
+        runs.append(i)
+        i = end
+    return runs
+
+
+def gallopMerge(src, dst, left, mid, right):
+    """
+    stable merge of the adjacent sorted ranges [left, mid) and [mid, right) of src into the same positions of dst.
+    the prefix of the left run and the suffix of the right run that are already in place are found by galloping
+    and copied as slices, and once one side wins MIN_GALLOP times in a row the rest of its winning streak is
+    found by galloping too.
+
+    :param src: the array holding both runs
+    :param dst: the output array, may not be src
+    :param left: the start of the left run
+    :param mid: the start of the right run
+    :param right: the end of the right run
+    :return: None
+    """
+    i = gallopRight(src, src[mid], left, mid)
+    end = gallopLeft(src, src[mid - 1], mid, right)
+    dst[left:i] = src[left:i]
+    dst[end:right] = src[end:right]
+    j, k = mid, i
+    wins_left = wins_right = 0
+    while i < mid and j < end:
+        if src[j] < src[i]:
+            dst[k] = src[j]
+            j += 1
+            k += 1
+            wins_left, wins_right = 0, wins_right + 1
+            if wins_right >= MIN_GALLOP:
+                stop = gallopLeft(src, src[i], j, end)
+                dst[k:k + stop - j] = src[j:stop]
+                k += stop - j
+                j = stop
+                wins_right = 0
+        else:
+            dst[k] = src[i]
+            i += 1
+            k += 1
+            wins_left, wins_right = wins_left + 1, 0
+            if wins_left >= MIN_GALLOP:
+                stop = gallopRight(src, src[j], i, mid)
+                dst[k:k + stop - i] = src[i:stop]
+                k += stop - i
+                i = stop
+                wins_left = 0
+    dst[k:k + mid - i] = src[i:mid]
+    k += mid - i
+    dst[k:k + end - j] = src[j:end]
+
+
+def gallopLeft(dataset, key, lo, hi):
+    """
+    exponential search from lo for the first index in [lo, hi) whose value is not less than the key.
+
+    :param dataset: a sorted array
+    :param key: the value to be searched for
+    :param lo: the start of the range
+    :param hi: the end of the range
+    :return: the lower bound of the key in the range
+    :rtype: int
+    """
+    last, probe, offset = lo, lo, 1
+    while probe < hi and dataset[probe] < key:
+        last = probe + 1
+        probe = lo + offset
+        offset = (offset << 1) + 1
+    hi = min(probe, hi)
+    while last < hi:
+        m = (last + hi) >> 1
+        if dataset[m] < key: last = m + 1
+        else: hi = m
+    return last
+
+
+def gallopRight(dataset, key, lo, hi):
+    """
+    exponential search from lo for the first index in [lo, hi) whose value is greater than the key.
+
+    :param dataset: a sorted array
+    :param key: the value to be searched for
+    :param lo: the start of the range
+    :param hi: the end of the range
+    :return: the upper bound of the key in the range
+    :rtype: int
+    """
+    last, probe, offset = lo, lo, 1
+    while probe < hi and not key < dataset[probe]:
+        last = probe + 1
+        probe = lo + offset
+        offset = (offset << 1) + 1
+    hi = min(probe, hi)
+    while last < hi:
+        m = (last + hi) >> 1
+        if key < dataset[m]: hi = m
+        else: last = m + 1
+    return last
+
+
+def mergeSorted(left: np.ndarray, right: np.ndarray, out: np.ndarray):
+    """
+    vectorized stable merge of two sorted arrays. the final position of every element is its own index
+    plus the number of elements from the other side that come before it, ties going to the left side.
+
+    :param left: a sorted array
+    :param right: a sorted array
+    :param out: output array of length len(left) + len(right), may not overlap the inputs
+    :return: the output array
+    """
+    out[np.arange(len(left)) + np.searchsorted(right, left, 'left')] = left
+    out[np.arange(len(right)) + np.searchsorted(left, right, 'right')] = right
+    return out
 
 
 def heapify(dataset, node, bound):
@@ -220,6 +799,225 @@ def heapify(dataset, node, bound):
         heapify(dataset, largest, bound)
 
 
+def heapifyMin(dataset, node, bound):
+    """
+    mirror image of heapify, any arbitrary parent will be less than its children.
+
+    :param dataset: the input array
+    :param node: the current node
+    :param bound: the number of elements in the heap
+    :return: None
+    """
+    left = node * 2 + 1
+    right = node * 2 + 2
+    smallest = node
+    if left < bound and dataset[left] < dataset[node]:
+        smallest = left
+    if right < bound and dataset[right] < dataset[smallest]:
+        smallest = right
+    if smallest != node:
+        swap(dataset, node, smallest)
+        heapifyMin(dataset, smallest, bound)
+
+
+def heapsortRange(dataset, left, right):
+    """
+    heapsorts the inclusive range [left, right] of an array in place.
+
+    :param dataset: the input array
+    :param left: the first index of the range
+    :param right: the last index of the range
+    :return: None
+    """
+    part = dataset[left:right + 1]
+    heapsort(part)
+    # slices of numpy arrays are views and are already sorted in place, lists need the copy written back
+    if not isinstance(dataset, np.ndarray): dataset[left:right + 1] = part
+
+
+def insertionSort(dataset, left, right):
+    """
+    insertion sorts the inclusive range [left, right] of an array in place, stable.
+
+    :param dataset: the input array
+    :param left: the first index of the range
+    :param right: the last index of the range
+    :return: None
+    """
+    for i in range(left + 1, right + 1):
+        value = dataset[i]
+        j = i - 1
+        while j >= left and dataset[j] > value:
+            dataset[j + 1] = dataset[j]
+            j -= 1
+        dataset[j + 1] = value
+
+
+def medianOfThree(dataset, a, b, c):
+    """
+    finds the index holding the median of the values at three indices.
+
+    :param dataset: the input array
+    :param a: index 1
+    :param b: index 2
+    :param c: index 3
+    :return: the index of the median value
+    :rtype: int
+    """
+    if dataset[a] < dataset[b]:
+        if dataset[b] < dataset[c]: return b
+        return c if dataset[a] < dataset[c] else a
+    if dataset[a] < dataset[c]: return a
+    return c if dataset[b] < dataset[c] else b
+
+
+def choosePivot(dataset, left, right):
+    """
+    picks a pivot index for the inclusive range [left, right], median-of-three for short ranges and
+    the ninther (median of three medians-of-three) for ranges longer than 40 elements.
+
+    :param dataset: the input array
+    :param left: the first index of the range
+    :param right: the last index of the range
+    :return: the index of the pivot
+    :rtype: int
+    """
+    mid = left + ((right - left) >> 1)
+    if right - left < 40:
+        return medianOfThree(dataset, left, mid, right)
+    step = (right - left) >> 3
+    return medianOfThree(dataset,
+                         medianOfThree(dataset, left, left + step, left + 2 * step),
+                         medianOfThree(dataset, mid - step, mid, mid + step),
+                         medianOfThree(dataset, right - 2 * step, right - step, right))
+
+
+def partitionThreeWay(dataset, left, right, pivot):
+    """
+    dutch national flag partition of the inclusive range [left, right] about a pivot value: values less
+    than the pivot end up on the left, equal values in the middle and greater values on the right.
+
+    :param dataset: the input array
+    :param left: the first index of the range
+    :param right: the last index of the range
+    :param pivot: the pivot value
+    :return: the first and last index of the run of values equal to the pivot
+    """
+    lt, i, gt = left, left, right
+    while i <= gt:
+        if dataset[i] < pivot:
+            swap(dataset, lt, i)
+            lt += 1
+            i += 1
+        elif dataset[i] > pivot:
+            swap(dataset, i, gt)
+            gt -= 1
+        else:
+            i += 1
+    return lt, gt
+
+
+def buildHeap(dataset, bound):
+    """
+    first phase of heapsort, heapifies the set from below so the largest value ends up at the root.
+    O(n) overall.
+
+    :param dataset: the input array
+    :param bound: the number of elements in the heap
+    :return: None
+    """
+    for i in range((bound >> 1) - 1, -1, -1):
+        heapify(dataset, i, bound)
+
+
+def siftHeap(dataset, bound):
+    """
+    second phase of heapsort, repeatedly moves the root to the end of the heap and sifts down, heapify can
+    be repurposed for this.
+
+    :param dataset: a heapified array
+    :param bound: the number of elements in the heap
+    :return: None
+    """
+    for i in range(bound - 1, 0, -1):
+        # swap largest value with first value outside of sorting range
+        swap(dataset, 0, i)
+        # heapify again so that the largest value is at the top
+        heapify(dataset, 0, i)
+
+
+def partition(dataset, left, right):
+    """
+    lomuto partition of the inclusive range [left, right] about the rightmost value, moving greater elements
+    to the right and lesser elements to the left.
+
+    :param dataset: the input array
+    :param left: the first index of the range
+    :param right: the last index of the range, holding the pivot
+    :return: the final index of the pivot
+    :rtype: int
+    """
+    index, pivot = left, right
+    # iterate over the range at the top of the stack
+    for i in range(left, pivot):
+        # compare values with pivot - increment least index if less than value at pivot
+        if dataset[i] < dataset[pivot]:
+            swap(dataset, i, index)
+            index += 1
+    # swapping the value at the pivot effectively moves greater values to the right of the pivot
+    swap(dataset, index, pivot)
+    return index
+
+
+def genChunk(generator, distribution, start, count, size, high, dtype, unique=8, k=16, period=1000, zipf=1.5):
+    """
+    generates one chunk of a named distribution, the bulk of genChunks().
+
+    :param generator: the np.random.Generator to draw from
+    :param distribution: one of DISTRIBUTIONS
+    :param start: the index of the first element of the chunk in the whole dataset
+    :param count: the number of elements in the chunk
+    :param size: the number of elements in the whole dataset
+    :param high: the exclusive upper bound of the values
+    :param dtype: the dtype of the chunk
+    :param unique: the number of distinct values for 'few-unique', default 8
+    :param k: the maximum displacement from sorted position for 'k-sorted', default 16
+    :param period: the length of each ramp for 'sawtooth', default 1000
+    :param zipf: the exponent for 'zipf', must be greater than 1, default 1.5
+    :return: the generated chunk
+    """
+    floating = dtype.kind == 'f'
+    if distribution == 'uniform':
+        values = generator.random(count) * high if floating else generator.integers(0, high, count)
+    elif distribution == 'zipf':
+        values = np.minimum(generator.zipf(zipf, count) - 1, high - 1)
+    elif distribution == 'few-unique':
+        values = generator.integers(0, unique, count) * (high // unique)
+    elif distribution == 'gaussian':
+        values = np.clip(generator.normal(high / 2, high / 8, count), 0, high - 1)
+    elif distribution == 'sawtooth':
+        values = np.arange(start, start + count) % period / period * high
+    elif distribution == 'organ-pipe':
+        # ascending over the first half of the dataset, descending over the second
+        index = np.arange(start, start + count)
+        values = np.minimum(index, size - 1 - index) / max(1, (size - 1) / 2) * (high - 1)
+    else:
+        # sorted data is drawn per chunk from the slice of the value range matching the chunk's position
+        first = start if distribution != 'reversed' else size - start - count
+        if floating:
+            values = np.sort(generator.uniform(high * first / size, high * (first + count) / size, count))
+        else:
+            lo, hi = high * first // size, high * (first + count) // size
+            values = np.sort(generator.integers(lo, max(hi, lo + 1), count))
+        if distribution == 'reversed':
+            values = values[::-1]
+        elif distribution == 'k-sorted':
+            # shuffling within aligned blocks of k moves every element less than k places
+            blocks = count // k * k
+            values[:blocks] = generator.permuted(values[:blocks].reshape(-1, k), axis=1).reshape(-1)
+    return np.asarray(values).astype(dtype)
+
+
 def peek(stack):
     """
     helper function to peek at the top of a array, returning None if empty.
@@ -231,6 +1029,28 @@ def peek(stack):
     return stack[-1] if stack else None
 
 
+def descend(depth):
+    """
+    helper function called each time an iterative selection narrows to a nested range, kept separate so
+    instrument can see how deep a recursive version would go.
+
+    :param depth: the number of nested ranges entered so far
+    :return: None
+    """
+
+
+def push(stack, item):
+    """
+    helper function to push onto the explicit stack of an iterative sort, kept separate so instrument can see
+    how deep the stack grows.
+
+    :param stack: a list used as a stack
+    :param item: the value to be pushed
+    :return: None
+    """
+    stack.append(item)
+
+
 def swap(dataset, i, j):
     """
     helper function to swap values at two indices in a array.
@@ -245,36 +1065,98 @@ def swap(dataset, i, j):
 # =========================================== DATA, FILE I/O, TESTING ===========================================
 
 
-def genData(file, size, power=31):
+# the named distributions genDistribution() and genChunks() can produce
+DISTRIBUTIONS = ('uniform', 'zipf', 'few-unique', 'sorted', 'reversed', 'k-sorted', 'sawtooth', 'gaussian',
+                 'organ-pipe')
+
+
+def genData(file, size, power=31, seed=None):
     """
     generates random integer data within a certain range and puts it in a file.
 
     :param file: string - the relative path of the output file
     :param size: the amount of data to be generated
     :param power: 2^power is the max bound of randomly generated data
+    :param seed: seed of the generator - optional, the module-level generator is used if None
     :return: None
     """
-    open(file, 'w').close()
-    f = open(file, "a")
-    for i in range(size):
-        j = int(rng.random() * float(2 ** power - 1))
-        f.write(str(j) + "\n")
-    f.close()
+    genDataChunked(file, size, power=power, seed=rng if seed is None else seed, binary=False)
 
 
-def genDataArray(size, power=31):
+def genDataArray(size, power=31, seed=None):
     """
     generates random integer data within a certain range (0 to 2^power) and returns it as a array.
 
     :param size: the amount of data to be generated
     :param power: 2^power is the max bound of randomly generated data
+    :param seed: seed of the generator - optional, the module-level generator is used if None
     :return: the randomly generated array
     """
-    temp = []
-    for i in range(size):
-        temp.append(int(rand.random() * 2 ** power))
-    return_array = np.array(temp)
-    return return_array
+    return genDistribution(size, power=power, seed=rng if seed is None else seed)
+
+
+def genDistribution(size, distribution='uniform', power=31, dtype=np.int64, seed=None, **params):
+    """
+    generates an array following a named distribution in vectorized calls from a seeded np.random.Generator,
+    so runs can be reproduced.
+
+    :param size: the amount of data to be generated
+    :param distribution: one of DISTRIBUTIONS, default 'uniform'
+    :param power: 2^power is the max bound of generated data, default 31
+    :param dtype: the dtype of the array, integer or floating point, default int64
+    :param seed: an int seed or a np.random.Generator - optional, fresh entropy if None
+    :param params: distribution parameters, see genChunk()
+    :return: the generated array
+    """
+    chunks = list(genChunks(size, distribution, power, dtype, seed, max(1, size), **params))
+    return chunks[0] if chunks else np.empty(0, dtype=dtype)
+
+
+def genChunks(size, distribution='uniform', power=31, dtype=np.int64, seed=None, chunk=1 << 20, **params):
+    """
+    generates a dataset following a named distribution as a stream of arrays of bounded size, so datasets
+    far larger than memory can be produced. order-dependent distributions are generated per chunk from the
+    chunk's position in the whole dataset, so the stream as a whole keeps its shape.
+
+    :param size: the amount of data to be generated
+    :param distribution: one of DISTRIBUTIONS, default 'uniform'
+    :param power: 2^power is the max bound of generated data, default 31
+    :param dtype: the dtype of the arrays, integer or floating point, default int64
+    :param seed: an int seed or a np.random.Generator - optional, fresh entropy if None
+    :param chunk: the maximum number of elements per array, default 1048576
+    :param params: distribution parameters, see genChunk()
+    :return: a generator of arrays
+    """
+    if distribution not in DISTRIBUTIONS: raise ValueError(f'unknown distribution {distribution}')
+    generator = np.random.default_rng(seed)
+    dtype = np.dtype(dtype)
+    high = 2 ** power
+    if dtype.kind in 'iu': high = min(high, int(np.iinfo(dtype).max) + 1)
+    for start in range(0, size, chunk):
+        yield genChunk(generator, distribution, start, min(chunk, size - start), size, high, dtype, **params)
+
+
+def genDataChunked(file, size, distribution='uniform', power=31, dtype=np.int64, seed=None, chunk=1 << 20,
+                   binary=True, **params):
+    """
+    generates a dataset straight to disk chunk by chunk, with memory bounded by the chunk size.
+
+    :param file: string - the relative path of the output file
+    :param size: the amount of data to be generated
+    :param distribution: one of DISTRIBUTIONS, default 'uniform'
+    :param power: 2^power is the max bound of generated data, default 31
+    :param dtype: the dtype of the data, default int64
+    :param seed: an int seed or a np.random.Generator - optional, fresh entropy if None
+    :param chunk: the number of elements generated at once, default 1048576
+    :param binary: whether to write the binary dataset format instead of one value per line, default True
+    :param params: distribution parameters, see genChunk()
+    :return: the header dict for binary files, None for text files
+    """
+    chunks = genChunks(size, distribution, power, dtype, seed, chunk, **params)
+    if binary: return datafile.writeChunks(file, chunks, dtype)
+    with open(file, 'w') as f:
+        for data in chunks:
+            f.write(''.join(f'{value}\n' for value in data.tolist()))
 
 
 def writeData(file, dataset):